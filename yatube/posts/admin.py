@@ -1,35 +1,75 @@
 from django.contrib import admin
+from django.db.models import Q
 
 from . import models
+from .paginators import EstimatedCountPaginator
+from .search import filter_posts
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Списки больших таблиц: без полного COUNT(*) на каждой странице.
+
+    exact_search_fields ищутся точным совпадением, чтобы поиск по
+    имени пользователя шёл по уникальному индексу, а не LIKE '%q%'."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    exact_search_fields = ()
+    empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.exact_search_fields or not search_term:
+            return super().get_search_results(
+                request, queryset, search_term)
+        condition = Q()
+        for field in self.exact_search_fields:
+            condition |= Q(**{field: search_term.strip()})
+        return queryset.filter(condition), False
 
 
 @admin.register(models.Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('text', 'pub_date', 'author', 'group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'pub_date'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту идёт через полнотекстовый индекс; в списке
+        все найденные записи, а не первые POSTS_SEARCH_LIMIT."""
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
 
 
 @admin.register(models.Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description',)
-    search_fields = ('slug',)
+    search_fields = ('title', 'slug',)
     list_filter = ('title',)
     empty_value_display = '-пусто-'
 
 
 @admin.register(models.Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('post', 'author', 'text',)
-    search_fields = ('author',)
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    raw_id_fields = ('parent',)
+    search_fields = ('author__username',)
+    exact_search_fields = ('author__username',)
     list_filter = ('created',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'created'
 
 
 @admin.register(models.Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('user', 'author',)
-    search_fields = ('user', 'author',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username',)
+    exact_search_fields = ('user__username', 'author__username',)
     list_filter = ('created',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'created'
@@ -0,0 +1,66 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _run(key, func, args):
+    # Ключ снимается до запуска: изменения, сделанные во время работы
+    # задачи, поставят её ещё раз.
+    with _lock:
+        _pending.discard(key)
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s не выполнена', key)
+    finally:
+        connections.close_all()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_BACKGROUND_WORKERS,
+                thread_name_prefix='posts-background',
+            )
+    return _executor
+
+
+def shutdown(wait=True):
+    global _executor
+    with _lock:
+        pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def submit(key, func, *args):
+    """Ставит func(*args) в фоновый пул, если задача с тем же ключом
+    ещё не ждёт своей очереди.
+
+    При POSTS_BACKGROUND_WORKERS = 0 задача выполняется сразу,
+    в вызывающем потоке."""
+    if not settings.POSTS_BACKGROUND_WORKERS:
+        func(*args)
+        return
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    executor().submit(_run, key, func, args)
+
+
+def submit_on_commit(key, func, *args):
+    """Как submit(), но после фиксации транзакции: задача должна видеть
+    изменения, ради которых её поставили."""
+    transaction.on_commit(lambda: submit(key, func, *args))
@@ -0,0 +1,13 @@
+from .cards import CardsScenario
+from .routes import RoutesScenario
+from .startup import StartupScenario
+from .threads import ThreadsScenario
+from .writers import WritersScenario
+
+SCENARIOS = [
+    CardsScenario(),
+    RoutesScenario(),
+    StartupScenario(),
+    ThreadsScenario(),
+    WritersScenario(),
+]
@@ -0,0 +1,51 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class Scenario:
+    name = ''
+    help = ''
+
+    def add_arguments(self, parser):
+        pass
+
+    def run(self, out, **options):
+        raise NotImplementedError
+
+
+@contextmanager
+def sandbox():
+    """Данные бенчмарка создаются в транзакции и откатываются."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summary(timings):
+    return {
+        'mean': statistics.mean(timings),
+        'p50': percentile(timings, 0.5),
+        'p95': percentile(timings, 0.95),
+    }
+
+
+def format_summary(values):
+    return '  '.join(f'{name} {value:8.2f}' for name, value in values.items())
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from PIL import Image
+
+from posts import thumbnails
+from posts.cache import prefetch_cards
+from posts.models import Group, Post, User
+
+from .base import Scenario, format_summary, measure, sandbox, summary
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (1600, 1200), (120, 160, 200)).save(buffer, 'JPEG')
+    return default_storage.save('posts/benchmark.jpg',
+                                ContentFile(buffer.getvalue()))
+
+
+class CardsScenario(Scenario):
+    name = 'cards'
+    help = ('Рендер главной страницы из N карточек с холодным и '
+            'тёплым кешем карточек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 50, 100])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def render_index(self, request, posts):
+        return render_to_string('index.html', {
+            'page': posts,
+            'prefetched_cards': prefetch_cards(posts),
+        }, request=request)
+
+    def run(self, out, sizes, repeat, **options):
+        media_root = tempfile.mkdtemp()
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        try:
+            with override_settings(MEDIA_ROOT=media_root), sandbox():
+                author = User.objects.create_user(username='benchmark_cards')
+                group = Group.objects.create(
+                    title='Бенчмарк', slug='benchmark-cards',
+                    description='Карточки')
+                image = make_image()
+                Post.objects.bulk_create([
+                    Post(text=f'Запись {i}\nвторая строка',
+                         author=author, group=group, image=image)
+                    for i in range(max(sizes))
+                ])
+                for post in author.posts.only('pk'):
+                    thumbnails.generate(post.pk)
+                for size in sizes:
+                    posts = list(Post.objects.for_feed()[:size])
+
+                    def cold():
+                        cache.clear()
+                        self.render_index(request, posts)
+
+                    cold_timings = measure(cold, repeat)
+                    self.render_index(request, posts)
+                    warm_timings = measure(
+                        lambda: self.render_index(request, posts), repeat)
+                    out.write(f'{size:4d} posts  cold  '
+                              f'{format_summary(summary(cold_timings))} ms')
+                    out.write(f'{size:4d} posts  warm  '
+                              f'{format_summary(summary(warm_timings))} ms')
+        finally:
+            cache.clear()
+            shutil.rmtree(media_root, ignore_errors=True)
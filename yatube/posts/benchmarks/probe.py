@@ -0,0 +1,66 @@
+"""Замер одного процесса для сценария startup.
+
+Запускается отдельным интерпретатором по пути к файлу, а не через
+пакет posts.benchmarks: его __init__ импортирует модели до
+django.setup(). Печатает одну строку JSON."""
+import argparse
+import json
+import resource
+import sys
+import time
+
+started = time.perf_counter()
+
+
+def rss_kb():
+    # На Linux ru_maxrss в килобайтах: пик памяти процесса.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def request(application, path):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {'PATH_INFO': path}
+    setup_testing_defaults(environ)
+    statuses = []
+    begun = time.perf_counter()
+    response = application(
+        environ, lambda status, headers, exc_info=None: statuses.append(
+            status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return (time.perf_counter() - begun) * 1000, statuses[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paths', nargs='+', default=['/'])
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    # Тот же вход, что у WSGI-сервера, вместе с прогревом шаблонов.
+    from yatube.wsgi import application
+    result = {
+        'setup_ms': (time.perf_counter() - started) * 1000,
+        'setup_kb': rss_kb(),
+        'modules': len(sys.modules),
+    }
+    first = [request(application, path) for path in args.paths]
+    result['first_ms'] = sum(elapsed for elapsed, _ in first)
+    result['statuses'] = [status for _, status in first]
+    timings = []
+    for number in range(args.requests):
+        path = args.paths[number % len(args.paths)]
+        timings.append(request(application, path)[0])
+    timings.sort()
+    result['p50'] = timings[len(timings) // 2] if timings else 0.0
+    result['rss_kb'] = rss_kb()
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+import json
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.seed import Seeder
+from yatube.instrumentation import collect
+
+from .base import Scenario, percentile, sandbox
+
+# Изменения этих метрик выводятся рядом с базовой линией.
+COMPARED = ('p50', 'p95', 'queries')
+# Регрессия — рост медианы больше --tolerance или любой рост числа
+# запросов; хвосты распределения для такой проверки слишком шумны.
+EXACT = ('queries',)
+
+
+class Route:
+    """Замеряемый адрес; prepare — запрос, который перед каждым замером
+    без учёта времени возвращает данные в исходное состояние."""
+
+    def __init__(self, name, url, method='get', data=None, client='guest',
+                 status=200, prepare=None):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.client = client
+        self.status = status
+        self.prepare = prepare
+
+
+class RoutesScenario(Scenario):
+    name = 'routes'
+    help = ('Замер каждого адреса posts/urls.py на засеянных данных '
+            'нескольких размеров со сравнением с базовой линией.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000],
+            help='Размеры данных в записях.',
+        )
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON с прошлыми результатами для сравнения.',
+        )
+        parser.add_argument(
+            '--save', help='Куда сохранить результаты в формате JSON.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост медианы относительно базовой линии.',
+        )
+
+    def seed(self, size):
+        Seeder(
+            users=max(10, size // 10), groups=10, posts=size,
+            follows=size * 2, comments=size, prefix=f'routes{size}',
+        ).run()
+        reader = User.objects.filter(
+            username__startswith=f'routes{size}_',
+        ).order_by('-stats__following_count').first()
+        author = User.objects.filter(
+            username__startswith=f'routes{size}_',
+        ).order_by('-stats__followers_count').first()
+        group = Group.objects.filter(
+            slug__startswith=f'routes{size}-',
+        ).annotate(total=Count('posts')).order_by('-total').first()
+        post = Post.objects.filter(
+            author__username__startswith=f'routes{size}_',
+        ).order_by('-comment_count').first()
+        own = Post.objects.create(text='Своя запись', author=reader)
+        thread = Comment.objects.filter(
+            post__author__username__startswith=f'routes{size}_',
+        ).values('thread_id').annotate(
+            total=Count('id')).order_by('-total').first()
+        root = Comment.objects.select_related('post__author').get(
+            pk=thread['thread_id'])
+        return reader, author, group, post, own, root
+
+    def routes(self, author, group, post, own, root):
+        post_kwargs = {'username': post.author.username, 'post_id': post.pk}
+        own_kwargs = {'username': own.author.username, 'post_id': own.pk}
+        author_kwargs = {'username': author.username}
+        thread_kwargs = {'username': root.post.author.username,
+                         'post_id': root.post_id, 'comment_id': root.pk}
+        follow = reverse('profile_follow', kwargs=author_kwargs)
+        unfollow = reverse('profile_unfollow', kwargs=author_kwargs)
+        return [
+            Route('index', reverse('index')),
+            Route('group', reverse('group_posts', args=[group.slug])),
+            Route('profile', reverse('profile', kwargs=author_kwargs)),
+            Route('post', reverse('post', kwargs=post_kwargs)),
+            Route('post_comments',
+                  reverse('post_comments', kwargs=post_kwargs)),
+            Route('comment_thread',
+                  reverse('comment_thread', kwargs=thread_kwargs)),
+            Route('search', reverse('search') + '?q=город'),
+            Route('follow', reverse('follow_index'), client='reader'),
+            Route('new', reverse('new_post'), client='reader'),
+            Route('new_post', reverse('new_post'), method='post',
+                  data={'text': 'Новая запись'}, client='reader',
+                  status=302),
+            Route('edit', reverse('post_edit', kwargs=own_kwargs),
+                  client='reader'),
+            Route('edit_post', reverse('post_edit', kwargs=own_kwargs),
+                  method='post', data={'text': 'Правка'},
+                  client='reader', status=302),
+            Route('comment', reverse('add_comment', kwargs=post_kwargs),
+                  method='post', data={'text': 'Комментарий'},
+                  client='reader', status=302),
+            # Каждый замер подписки и отписки — настоящая запись, а не
+            # повтор для уже подписанного или отписанного читателя.
+            Route('follow_author', follow, client='reader', status=302,
+                  prepare=Route('unfollow', unfollow, client='reader',
+                                status=302)),
+            Route('unfollow_author', unfollow, client='reader', status=302,
+                  prepare=Route('follow', follow, client='reader',
+                                status=302)),
+        ]
+
+    def send(self, clients, route):
+        client = clients[route.client]
+        response = getattr(client, route.method)(route.url, route.data)
+        if response.status_code != route.status:
+            raise CommandError(
+                f'{route.name}: ответ {response.status_code} '
+                f'вместо {route.status}')
+
+    def prepare(self, clients, route, warm):
+        if route.prepare:
+            self.send(clients, route.prepare)
+        if not warm:
+            cache.clear()
+
+    def request(self, clients, route, warm):
+        self.prepare(clients, route, warm)
+        with collect() as stats:
+            self.send(clients, route)
+        return stats
+
+    def peak_memory(self, clients, route, warm):
+        self.prepare(clients, route, warm)
+        tracemalloc.start()
+        try:
+            self.send(clients, route)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def measure_route(self, clients, route, repeat, warm):
+        # Первый запрос прогревает импорты и загрузку шаблонов.
+        self.request(clients, route, warm)
+        runs = [self.request(clients, route, warm) for _ in range(repeat)]
+        latency = [stats.total_time * 1000 for stats in runs]
+        return {
+            'p50': percentile(latency, 0.5),
+            'p95': percentile(latency, 0.95),
+            'p99': percentile(latency, 0.99),
+            'queries': max(stats.queries for stats in runs),
+            'sql_ms': sum(stats.query_time for stats in runs)
+            * 1000 / repeat,
+            'template_ms': sum(stats.template_time for stats in runs)
+            * 1000 / repeat,
+            'peak_kb': self.peak_memory(clients, route, warm) / 1024,
+        }
+
+    def measure_size(self, size, repeat, warm):
+        with sandbox():
+            reader, author, group, post, own, root = self.seed(size)
+            clients = {'guest': Client(), 'reader': Client()}
+            clients['reader'].force_login(reader)
+            results = {}
+            for route in self.routes(author, group, post, own, root):
+                results[route.name] = self.measure_route(
+                    clients, route, repeat, warm)
+            cache.clear()
+            return results
+
+    def format_row(self, name, values, baseline=None):
+        line = (f'{name:16s} p50 {values["p50"]:7.2f}  '
+                f'p95 {values["p95"]:7.2f}  p99 {values["p99"]:7.2f} ms  '
+                f'{values["queries"]:3d} queries {values["sql_ms"]:6.2f} ms  '
+                f'templates {values["template_ms"]:6.2f} ms  '
+                f'peak {values["peak_kb"]:8.1f} KiB')
+        if baseline:
+            changes = '  '.join(
+                f'{metric} {values[metric] / baseline[metric] - 1:+.0%}'
+                for metric in COMPARED if baseline.get(metric))
+            line += f'  [{changes}]'
+        return line
+
+    def regressions(self, results, baseline, tolerance):
+        for size, routes in results.items():
+            for name, values in routes.items():
+                previous = baseline.get(size, {}).get(name)
+                if not previous:
+                    continue
+                for metric in ('p50', *EXACT):
+                    allowed = 0 if metric in EXACT else tolerance
+                    if values[metric] > previous[metric] * (1 + allowed):
+                        yield (f'{size} / {name}: {metric} '
+                               f'{previous[metric]:.2f} → '
+                               f'{values[metric]:.2f}')
+
+    def run(self, out, sizes, repeat, warm, baseline, save, tolerance,
+            **options):
+        previous = {}
+        if baseline:
+            with open(baseline) as source:
+                previous = json.load(source)
+        results = {}
+        with override_settings(DEBUG=False):
+            for size in sizes:
+                key = str(size)
+                results[key] = self.measure_size(size, repeat, warm)
+                out.write(f'{size} записей')
+                for name, values in results[key].items():
+                    out.write(self.format_row(
+                        name, values, previous.get(key, {}).get(name)))
+        if save:
+            with open(save, 'w') as target:
+                json.dump(results, target, indent=2, sort_keys=True)
+        found = list(self.regressions(results, previous, tolerance))
+        for line in found:
+            out.write(f'Регрессия: {line}')
+        if found:
+            raise CommandError(
+                f'Есть регрессии относительно {baseline}.')
@@ -0,0 +1,93 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from .base import Scenario
+
+PROBE = os.path.join(os.path.dirname(__file__), 'probe.py')
+
+# Переменные окружения каждого варианта запуска.
+VARIANTS = {
+    'development': {'SETTINGS_PROFILE': 'development'},
+    'production': {'SETTINGS_PROFILE': 'production',
+                   'TEMPLATE_WARMUP': 'False'},
+    'production+warmup': {'SETTINGS_PROFILE': 'production',
+                          'TEMPLATE_WARMUP': 'True'},
+}
+
+METRICS = (
+    ('setup_ms', 'запуск', 'ms'),
+    ('first_ms', 'первый запрос', 'ms'),
+    ('p50', 'p50 дальше', 'ms'),
+    ('setup_kb', 'память после запуска', 'KiB'),
+    ('rss_kb', 'память в конце', 'KiB'),
+    ('modules', 'модулей', ''),
+)
+
+
+class StartupScenario(Scenario):
+    name = 'startup'
+    help = ('Время запуска, первого запроса и память WSGI-процесса '
+            'в профилях настроек development и production, с прогревом '
+            'шаблонов и без.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--variants', nargs='+', choices=list(VARIANTS),
+            default=list(VARIANTS))
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Сколько процессов запустить для каждого профиля.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов в каждом процессе после первого.',
+        )
+        parser.add_argument('--paths', nargs='+', default=['/'])
+
+    def probe(self, variant, requests, paths):
+        environment = dict(
+            os.environ,
+            **VARIANTS[variant],
+            DJANGO_SETTINGS_MODULE='yatube.settings',
+            PYTHONPATH=settings.BASE_DIR,
+        )
+        # Явные DEBUG и TEMPLATE_WARMUP из окружения перебили бы
+        # профиль.
+        environment.pop('DEBUG', None)
+        if 'TEMPLATE_WARMUP' not in VARIANTS[variant]:
+            environment.pop('TEMPLATE_WARMUP', None)
+        completed = subprocess.run(
+            [sys.executable, PROBE, '--requests', str(requests),
+             '--paths', *paths],
+            cwd=settings.BASE_DIR, env=environment,
+            capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(
+                f'{variant}: процесс завершился с ошибкой\n'
+                f'{completed.stderr}')
+        return json.loads(completed.stdout.splitlines()[-1])
+
+    def run(self, out, variants, runs, requests, paths, **options):
+        results = {}
+        for variant in variants:
+            probes = [self.probe(variant, requests, paths)
+                      for _ in range(runs)]
+            results[variant] = {
+                metric: statistics.median(item[metric] for item in probes)
+                for metric, _, _ in METRICS
+            }
+            out.write(f'{variant}: ответы '
+                      f'{", ".join(probes[0]["statuses"])}')
+        out.write(f'{"":22s}'
+                  + ''.join(f'{name:>19s}' for name in variants))
+        for metric, title, unit in METRICS:
+            values = ''.join(
+                f'{results[name][metric]:19.1f}' for name in variants)
+            out.write(f'{title:22s}{values}  {unit}')
@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post, User
+from posts.threads import attach_replies, thread_comments
+
+from .base import Scenario, format_summary, measure, sandbox, summary
+
+
+def naive_thread(comment):
+    """Ветка обходом дерева: по запросу на детей каждого узла."""
+    result = [comment]
+    for reply in comment.replies.select_related('author').order_by('id'):
+        result.extend(naive_thread(reply))
+    return result
+
+
+class ThreadsScenario(Scenario):
+    name = 'threads'
+    help = ('Загрузка веток комментариев по пути и обходом дерева: '
+            'широкие ветки и одна глубокая.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--roots', type=int, default=20)
+        parser.add_argument('--replies', type=int, default=50)
+        parser.add_argument('--depth', type=int, default=Comment.MAX_DEPTH)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def report(self, out, label, func, repeat):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        timings = measure(func, repeat)
+        out.write(f'{label:24s} {len(context.captured_queries):5d} queries  '
+                  f'{format_summary(summary(timings))} ms')
+
+    def run(self, out, roots, replies, depth, repeat, **options):
+        with sandbox():
+            author = User.objects.create_user(username='benchmark_threads')
+            post = Post.objects.create(text='Обсуждение', author=author)
+
+            def reply(parent, text):
+                return Comment.objects.create(
+                    post=post, author=author, text=text, parent=parent)
+
+            wide = []
+            for number in range(roots):
+                root = reply(None, f'Ветка {number}')
+                wide.append(root)
+                for answer in range(replies):
+                    reply(root, f'Ответ {answer}')
+            deep = parent = reply(None, 'Глубокая ветка')
+            for level in range(depth):
+                parent = reply(parent, f'Уровень {level}')
+
+            def preview():
+                page = list(post.comments.filter(
+                    parent=None).select_related('author')[:roots])
+                attach_replies(page)
+
+            def naive_preview():
+                page = list(post.comments.filter(
+                    parent=None).select_related('author')[:roots])
+                for root in page:
+                    list(root.replies.select_related('author')[:3])
+
+            out.write(f'{roots} веток по {replies} ответов, '
+                      f'ветка глубиной {depth}')
+            self.report(out, 'wide: path', lambda: list(
+                thread_comments(wide[0])), repeat)
+            self.report(out, 'wide: tree walk', lambda: naive_thread(
+                wide[0]), repeat)
+            self.report(out, 'deep: path', lambda: list(
+                thread_comments(deep)), repeat)
+            self.report(out, 'deep: tree walk', lambda: naive_thread(
+                deep), repeat)
+            self.report(out, 'page preview: window', preview, repeat)
+            self.report(out, 'page preview: per root', naive_preview, repeat)
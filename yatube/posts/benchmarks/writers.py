@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .base import Scenario
+
+
+class WritersScenario(Scenario):
+    name = 'writers'
+    help = ('Нагрузочный тест: параллельные new_post и add_comment '
+            'в настроенную базу данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--without-pragmas', action='store_true',
+            help='Без WAL и busy_timeout, как до их настройки.',
+        )
+
+    def writer(self, user, target, requests, results, sessions):
+        client = Client()
+        comment_url = reverse('add_comment', kwargs={
+            'username': target.author.username, 'post_id': target.pk})
+        try:
+            client.force_login(user)
+            for number in range(requests):
+                try:
+                    if number % 2:
+                        client.post(comment_url, {'text': f'к{number}'})
+                    else:
+                        client.post(reverse('new_post'),
+                                    {'text': f'Запись {number}'})
+                    results['ok'] += 1
+                except OperationalError as error:
+                    results[str(error)] += 1
+        except OperationalError as error:
+            results[f'вход: {error}'] += 1
+        finally:
+            sessions.append(client.session.session_key)
+            connections.close_all()
+
+    def set_journal_mode(self, mode):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode = {mode}')
+
+    def run(self, out, threads, requests, without_pragmas, **options):
+        prefix = f'load_{uuid.uuid4().hex[:8]}'
+        users = [
+            User.objects.create_user(username=f'{prefix}_{number}')
+            for number in range(threads)
+        ]
+        target = Post.objects.create(text='Цель', author=users[0])
+        connections.close_all()
+        results = [Counter() for _ in users]
+        sessions = []
+        if without_pragmas:
+            self.set_journal_mode('DELETE')
+        workers = [
+            threading.Thread(
+                target=self.writer,
+                args=(user, target, requests, result, sessions),
+            ) for user, result in zip(users, results)
+        ]
+        started = time.perf_counter()
+        with override_settings(
+                DEBUG=False,
+                SQLITE_PRAGMAS={} if without_pragmas
+                else settings.SQLITE_PRAGMAS):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        elapsed = time.perf_counter() - started
+        if without_pragmas:
+            self.set_journal_mode(
+                settings.SQLITE_PRAGMAS.get('journal_mode', 'DELETE'))
+
+        total = sum(results, Counter())
+        Session.objects.filter(session_key__in=sessions).delete()
+        User.objects.filter(username__startswith=prefix).delete()
+
+        ok = total.pop('ok', 0)
+        out.write(f'{threads} потоков, {ok} успешных запросов '
+                  f'за {elapsed:.2f} с ({ok / elapsed:.1f} запр/с)')
+        if not total:
+            out.write('Ошибок нет.')
+        for error, count in total.most_common():
+            out.write(f'{count:6d}  {error}')
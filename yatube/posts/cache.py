@@ -0,0 +1,239 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpResponse
+
+from yatube.routers import use_primary
+
+TRACKED_KEYS_LIMIT = 10000
+
+_namespaces = {}
+
+
+class NamespacedCache:
+    """Обёртка над бэкендом кеша с префиксом ключей и статистикой.
+
+    Вытеснением считается промах по ключу, который этот процесс
+    записал и срок жизни которого ещё не истёк: бэкенды Django сами
+    о вытеснениях не сообщают.
+    """
+
+    def __init__(self, namespace, alias=None):
+        self.namespace = namespace
+        self.alias = alias
+        self.stats = Counter()
+        self._written = OrderedDict()
+        self._lock = threading.Lock()
+        _namespaces[namespace] = self
+
+    @property
+    def backend(self):
+        return caches[self.alias or settings.POSTS_CACHE_ALIAS]
+
+    def make_key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def _count(self, event, amount=1):
+        with self._lock:
+            self.stats[event] += amount
+
+    def _remember(self, keys, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.backend.default_timeout
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            for key in keys:
+                self._written[key] = expires
+                self._written.move_to_end(key)
+            while len(self._written) > TRACKED_KEYS_LIMIT:
+                self._written.popitem(last=False)
+
+    def _count_misses(self, keys):
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for key in keys:
+                if key in self._written:
+                    expires = self._written.pop(key)
+                    if expires is None or expires > now:
+                        evicted += 1
+            self.stats['misses'] += len(keys)
+            self.stats['evictions'] += evicted
+
+    def get(self, key, default=None):
+        full_key = self.make_key(key)
+        value = self.backend.get(full_key)
+        if value is None:
+            self._count_misses([full_key])
+            return default
+        self._count('hits')
+        return value
+
+    def get_many(self, keys):
+        full_keys = {self.make_key(key): key for key in keys}
+        found = self.backend.get_many(list(full_keys))
+        self._count('hits', len(found))
+        self._count_misses([key for key in full_keys if key not in found])
+        return {full_keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        full_key = self.make_key(key)
+        self.backend.set(full_key, value, timeout)
+        self._count('sets')
+        self._remember([full_key], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        full_data = {self.make_key(key): value for key, value in data.items()}
+        self.backend.set_many(full_data, timeout)
+        self._count('sets', len(full_data))
+        self._remember(full_data, timeout)
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        self.backend.delete(full_key)
+        with self._lock:
+            self._written.pop(full_key, None)
+
+    def unregister(self):
+        """Убирает пространство имён из cache_stats(): нужно временным
+        обёрткам, например в тестах."""
+        if _namespaces.get(self.namespace) is self:
+            del _namespaces[self.namespace]
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+            self._written.clear()
+
+
+def cache_stats():
+    return {
+        namespace: {
+            event: wrapper.stats[event]
+            for event in ('hits', 'misses', 'evictions', 'sets')
+        }
+        for namespace, wrapper in _namespaces.items()
+    }
+
+
+generation_cache = NamespacedCache('posts:generation')
+page_cache = NamespacedCache('posts:page')
+card_cache = NamespacedCache('posts:card')
+
+
+def generations(*names):
+    """Текущие поколения зависимостей страницы.
+
+    Поколение — случайная метка, которую меняет bump() при изменении
+    данных; старые страницы остаются в кеше под прежними ключами и
+    вытесняются по таймауту."""
+    stored = generation_cache.get_many(names)
+    missing = {
+        name: new_generation() for name in names if name not in stored
+    }
+    if missing:
+        generation_cache.set_many(missing, timeout=None)
+        stored.update(missing)
+    return [stored[name] for name in names]
+
+
+def new_generation():
+    # Метка начинается со времени смены поколения: см. is_fresh().
+    return f'{time.time():.6f}-{uuid.uuid4().hex}'
+
+
+def is_fresh(generation):
+    """Поколение моложе REPLICA_STICKY_SECONDS: реплика ещё может не
+    видеть изменения, из-за которого оно сменилось."""
+    try:
+        changed = float(generation.split('-', 1)[0])
+    except ValueError:
+        return False
+    return time.time() - changed < settings.REPLICA_STICKY_SECONDS
+
+
+def bump(*names):
+    generation_cache.set_many(
+        {name: new_generation() for name in names},
+        timeout=None,
+    )
+
+
+def page_variant(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'anonymous'
+
+
+def page_key(request, view_name, versions):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{view_name}:{path}:{page_variant(request)}:{".".join(versions)}'
+
+
+def card_key(post):
+    """Ключ карточки меняется вместе с записью, её автором и группой."""
+    group = post.group
+    version = '|'.join(str(part) for part in (
+        post.updated.isoformat(),
+        post.image_variants,
+        post.author.username,
+        group.slug if group else '',
+        group.title if group else '',
+    ))
+    digest = hashlib.md5(version.encode()).hexdigest()
+    return f'{post.pk}:{digest}'
+
+
+def prefetch_cards(posts):
+    """Готовые карточки страницы одним запросом к кешу: ключ -> HTML."""
+    return card_cache.get_many([card_key(post) for post in posts])
+
+
+def cache_versioned_page(*depends_on, anonymous_only=False, timeout=None):
+    """Кеширует страницу отдельно для гостей и для каждого пользователя.
+
+    depends_on — имена поколений; в них подставляются аргументы
+    представления и текущий пользователь, например 'user:{username}'.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cacheable = request.method in ('GET', 'HEAD') and not (
+                anonymous_only and request.user.is_authenticated)
+            if not cacheable:
+                return view(request, *args, **kwargs)
+            names = [
+                name.format(user=request.user, **kwargs)
+                for name in depends_on
+            ]
+            versions = generations(*names)
+            key = page_key(request, view.__name__, versions)
+            cached = page_cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            # Страница свежего поколения ложится в кеш на весь таймаут,
+            # поэтому её читают с основной базы, а не с отстающей
+            # реплики: иначе в кеш под новым ключом попадёт старый HTML.
+            primary = use_primary.set(
+                use_primary.get() or any(map(is_fresh, versions)))
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                use_primary.reset(primary)
+            if response.status_code == 200 and not response.streaming:
+                page_cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    timeout or settings.POSTS_PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
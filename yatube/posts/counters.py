@@ -0,0 +1,88 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+BATCH_SIZE = 1000
+
+AUTHOR_STATS_SOURCES = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def shift_author_stats(author_id, field, delta):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    if not stats.update(**{field: F(field) + delta}) and delta > 0:
+        recount_author_stats(author_ids=[author_id])
+
+
+def shift_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def actual_count(model, field):
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _batches(ids):
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def _repair(queryset, sources, dry_run):
+    """Находит строки с расхождением счётчиков и пересчитывает их."""
+    actual = {
+        field: actual_count(*source) for field, source in sources.items()}
+    drift = reduce(or_, (
+        ~Q(**{field: F(f'actual_{field}')}) for field in sources))
+    ids = list(
+        queryset.annotate(**{
+            f'actual_{field}': value for field, value in actual.items()
+        }).filter(drift).order_by('pk').values_list('pk', flat=True)
+    )
+    if not dry_run:
+        for batch in _batches(ids):
+            queryset.model.objects.filter(pk__in=batch).update(**actual)
+    return len(ids)
+
+
+def recount_author_stats(author_ids=None, dry_run=False):
+    users = User.objects.all()
+    if author_ids is not None:
+        users = users.filter(pk__in=author_ids)
+    missing = list(
+        users.filter(stats__isnull=True).values_list('pk', flat=True))
+    if not dry_run:
+        for batch in _batches(missing):
+            AuthorStats.objects.bulk_create(
+                [AuthorStats(author_id=pk) for pk in batch],
+                ignore_conflicts=True,
+            )
+    stats = AuthorStats.objects.all()
+    if author_ids is not None:
+        stats = stats.filter(pk__in=author_ids)
+    return len(missing), _repair(stats, AUTHOR_STATS_SOURCES, dry_run)
+
+
+def recount_comment_counts(post_ids=None, dry_run=False):
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return _repair(posts, {'comment_count': (Comment, 'post')}, dry_run)
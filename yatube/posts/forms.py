@@ -1,5 +1,10 @@
-from django.forms import ModelForm
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import ModelForm, ValidationError
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
+from .images import NormalizedImage, normalize
 from .models import Comment, Post
 
 
@@ -8,6 +13,28 @@ class PostForm(ModelForm):
         model = Post
         fields = ['text', 'group', 'image']
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        limit = settings.POSTS_IMAGE_MAX_UPLOAD_SIZE
+        if image.size > limit:
+            raise ValidationError(
+                f'Размер файла не должен превышать {filesizeformat(limit)}.')
+        try:
+            return normalize(image)
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError('Не удалось обработать изображение.')
+
+    def close(self):
+        """Закрывает временный файл обработанного изображения.
+
+        Вызывается после обработки формы: при сохранении хранилище уже
+        перенесло файл, и close() на перенесённом файле не падает."""
+        image = getattr(self, 'cleaned_data', {}).get('image')
+        if isinstance(image, NormalizedImage):
+            image.close()
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,81 @@
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image, ImageOps
+
+# Формат сохранения -> (расширение, тип содержимого).
+FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+# Форматы без прозрачности: альфа-канал накладывается на белый фон.
+OPAQUE_FORMATS = {'JPEG'}
+
+
+class NormalizedImage(TemporaryUploadedFile):
+    """Результат обработки во временном файле. Его нет в request.FILES,
+    поэтому Django его не закроет: это делает PostForm.close()."""
+
+
+def needs_normalizing(image, max_size):
+    if max(image.size) > max_size:
+        return True
+    if image.format == 'GIF':
+        # GIF может быть анимированным, перекодировать его не стоит.
+        return False
+    return image.format != settings.POSTS_IMAGE_FORMAT or bool(
+        image.info.get('exif'))
+
+
+def flatten(image, target_format):
+    has_alpha = (image.mode in ('RGBA', 'LA', 'PA')
+                 or 'transparency' in image.info)
+    if not has_alpha:
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    if target_format not in OPAQUE_FORMATS:
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def normalize(upload):
+    """Приводит загруженное изображение к формату POSTS_IMAGE_FORMAT.
+
+    Снимок поворачивается по EXIF, сами EXIF-данные не сохраняются,
+    длинная сторона уменьшается до POSTS_IMAGE_MAX_SIZE. Исходный файл
+    читается Pillow с диска по частям, JPEG сразу декодируется
+    в уменьшенном масштабе (Image.draft); результат пишется во
+    временный файл, а не в память. Если менять нечего, возвращается
+    исходная загрузка.
+    """
+    max_size = settings.POSTS_IMAGE_MAX_SIZE
+    target_format = settings.POSTS_IMAGE_FORMAT
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if not needs_normalizing(image, max_size):
+            upload.seek(0)
+            return upload
+        if image.format == 'JPEG':
+            image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        image = flatten(image, target_format)
+
+        name = os.path.splitext(os.path.basename(upload.name))[0]
+        extension, content_type = FORMATS[target_format]
+        result = NormalizedImage(
+            name + extension, content_type, 0, None)
+        image.save(
+            result,
+            target_format,
+            quality=settings.POSTS_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    result.size = result.tell()
+    result.seek(0)
+    return result
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Запускает сценарии замеров производительности.'
+
+    def add_arguments(self, parser):
+        scenarios = parser.add_subparsers(
+            dest='scenario', title='сценарии', required=True)
+        for scenario in SCENARIOS:
+            scenario.add_arguments(
+                scenarios.add_parser(scenario.name, help=scenario.help))
+
+    def handle(self, *args, **options):
+        scenario = next(
+            item for item in SCENARIOS if item.name == options['scenario'])
+        scenario.run(self.stdout, **options)
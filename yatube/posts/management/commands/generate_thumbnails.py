@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие варианты изображений для всех записей '
+            'с изображениями.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True).values_list('pk', flat=True)
+        created = 0
+        for post_id in posts.order_by().iterator():
+            if thumbnails.generate(post_id):
+                created += 1
+        self.stdout.write(f'Варианты изображений созданы для {created} '
+                          f'записей.')
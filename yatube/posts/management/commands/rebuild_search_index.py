@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс записей.'
+
+    def handle(self, *args, **options):
+        indexed = rebuild()
+        self.stdout.write(f'В поисковый индекс добавлено записей: {indexed}.')
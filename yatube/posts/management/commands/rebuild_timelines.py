@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет ленты подписок по текущим подпискам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='id пользователя, чью ленту нужно пересобрать.',
+        )
+
+    def handle(self, *args, **options):
+        rebuild(user_ids=options['user_ids'])
+        self.stdout.write('Ленты подписок пересобраны.')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_author_stats, recount_comment_counts
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованные счётчики постов, подписок '
+            'и комментариев и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать количество расхождений.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        created, authors = recount_author_stats(dry_run=dry_run)
+        posts = recount_comment_counts(dry_run=dry_run)
+        verb = 'найдено' if dry_run else 'исправлено'
+        self.stdout.write(
+            f'Статистика авторов: без записи {created}, {verb} {authors}.')
+        self.stdout.write(f'Счётчики комментариев: {verb} {posts}.')
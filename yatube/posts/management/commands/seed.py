@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, группами, '
+            'записями, подписками и комментариями для замеров.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed на пустой базе даёт одинаковые данные.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты записей.',
+        )
+        parser.add_argument(
+            '--follow-exponent', type=float, default=3.0,
+            help='Перекос подписчиков в сторону популярных авторов.',
+        )
+        parser.add_argument(
+            '--author-exponent', type=float, default=2.0,
+            help='Перекос записей в сторону активных авторов.',
+        )
+        parser.add_argument(
+            '--group-exponent', type=float, default=2.0,
+            help='Перекос записей в сторону крупных групп.',
+        )
+        parser.add_argument(
+            '--comment-exponent', type=float, default=2.0,
+            help='Перекос комментариев в сторону свежих записей.',
+        )
+        parser.add_argument(
+            '--reply-share', type=float, default=0.5,
+            help='Вероятность, что за комментарием в ветке идёт ответ.',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и адресов групп.',
+        )
+        parser.add_argument(
+            '--skip-timelines', action='store_true',
+            help=('Не заполнять ленты подписок: каждая подписка даёт '
+                  'до TIMELINE_BACKFILL_LIMIT строк.'),
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Для записей нужны пользователи.')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Для комментариев нужны записи.')
+        if not 0 <= options['reply_share'] < 1:
+            raise CommandError('--reply-share должен быть в [0, 1).')
+        seeder = Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'] if options['users'] > 1 else 0,
+            comments=options['comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            follow_exponent=options['follow_exponent'],
+            author_exponent=options['author_exponent'],
+            group_exponent=options['group_exponent'],
+            comment_exponent=options['comment_exponent'],
+            reply_share=options['reply_share'],
+            prefix=options['prefix'],
+            timelines=not options['skip_timelines'],
+        )
+        started = time.perf_counter()
+
+        def log(message):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{elapsed:8.1f} с  {message}')
+
+        seeder.run(log)
@@ -0,0 +1,85 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+# Индекс в том виде, в каком его создаёт эта миграция: последующие
+# изменения posts.search не должны менять уже применённую миграцию.
+WORD = re.compile(r'\w+')
+
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_search '
+    "USING fts5(text, group_title, tokenize = 'unicode61 remove_diacritics 2')"
+)
+SQLITE_INSERT = (
+    'INSERT INTO posts_post_search (rowid, text, group_title) '
+    'VALUES (%s, %s, %s)'
+)
+SQLITE_DROP = 'DROP TABLE IF EXISTS posts_post_search'
+
+POSTGRES_CREATE = [
+    "CREATE INDEX IF NOT EXISTS posts_post_text_search "
+    "ON posts_post USING GIN (to_tsvector('russian', text))",
+    "CREATE INDEX IF NOT EXISTS posts_group_title_search "
+    "ON posts_group USING GIN (to_tsvector('russian', title))",
+]
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS posts_post_text_search',
+    'DROP INDEX IF EXISTS posts_group_title_search',
+]
+
+BATCH_SIZE = 1000
+
+
+def index_row(stemmer, pk, text, group_title):
+    def stems(value):
+        words = WORD.findall(value.lower().replace('ё', 'е'))
+        return ' '.join(stemmer.stemWords(words))
+    return (pk, stems(text), stems(group_title or ''))
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for sql in POSTGRES_CREATE:
+                cursor.execute(sql)
+        return
+    if connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.using(connection.alias).values_list(
+        'pk', 'text', 'group__title')
+    stemmer = snowballstemmer.stemmer('russian')
+    with connection.cursor() as cursor:
+        cursor.execute(SQLITE_CREATE)
+        batch = []
+        for pk, text, group_title in posts.iterator():
+            batch.append(index_row(stemmer, pk, text, group_title))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(SQLITE_INSERT, batch)
+                batch = []
+        if batch:
+            cursor.executemany(SQLITE_INSERT, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {
+        'postgresql': POSTGRES_DROP,
+        'sqlite': [SQLITE_DROP],
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:36
+
+from django.db import migrations, models
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, LPad
+import django.db.models.deletion
+
+
+def root_existing_comments(apps, schema_editor):
+    # Все прежние комментарии — корни собственных веток.
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.using(schema_editor.connection.alias).update(
+        thread=F('id'),
+        path=LPad(Cast('id', CharField()), 10, Value('0')),
+        depth=0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_comment_cursor_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='thread',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Comment', verbose_name='Ветка'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['thread', 'path'], name='comment_thread_path'),
+        ),
+        migrations.RunPython(
+            root_existing_comments, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
@@ -26,6 +26,11 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Введите текст',
@@ -35,6 +40,10 @@ class Post(models.Model):
         'date published',
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        'date updated',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -54,15 +63,48 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True, null=True
     )
+    image_variants = models.TextField(
+        verbose_name='Варианты изображения',
+        blank=True,
+        default='',
+        editable=False,
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date'),
+        ]
 
     def __str__(self):
         return self.text[:15] + '...'
 
 
 class Comment(models.Model):
+    # Путь комментария — id предков и его собственный, дополненные
+    # нулями до PATH_STEP цифр: сортировка по пути даёт ветку в порядке
+    # обхода дерева, а всю ветку выбирает один запрос по thread.
+    PATH_STEP = 10
+    MAX_DEPTH = 20
+    # Отступ на странице растёт только до этой глубины, иначе на узком
+    # экране глубоким ответам не останется места.
+    MAX_INDENT_DEPTH = 5
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -81,13 +123,71 @@ class Comment(models.Model):
         'date published',
         auto_now_add=True,
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    thread = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        editable=False,
+        verbose_name='Ветка',
+    )
+    path = models.CharField(
+        max_length=255, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(
+        default=0, editable=False)
 
     class Meta:
-        ordering = ['-created']
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created'),
+            models.Index(
+                fields=['-created'],
+                name='comment_created'),
+            models.Index(
+                fields=['thread', 'path'],
+                name='comment_thread_path'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @property
+    def indent(self):
+        return min(self.depth, self.MAX_INDENT_DEPTH)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        # Слишком глубокие ответы становятся ответами на предка.
+        while self.parent is not None and (
+                self.parent.depth + 1 > self.MAX_DEPTH):
+            self.parent = self.parent.parent
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.place_in_thread()
+
+    def place_in_thread(self):
+        segment = str(self.pk).zfill(self.PATH_STEP)
+        if self.parent is None:
+            self.thread_id, self.path, self.depth = self.pk, segment, 0
+        else:
+            self.thread_id = self.parent.thread_id
+            self.path = f'{self.parent.path}.{segment}'
+            self.depth = self.parent.depth + 1
+        Comment.objects.filter(pk=self.pk).update(
+            thread_id=self.thread_id, path=self.path, depth=self.depth)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -116,3 +216,67 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} follows {self.author}'
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Записей', default=0)
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков', default=0)
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписан', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author} stats'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Запись',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('date published')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_post')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date'),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} in {self.user} timeline'
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу сортировки без COUNT(*) и OFFSET.
+
+    Курсор кодирует значения полей ordering последней (или первой)
+    записи страницы, следующая страница выбирается условием
+    «строго после курсора» по тому же составному ключу.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            object_list.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj):
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            values = json.loads(raw.decode())
+            if len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, forward):
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            seek = {
+                field.name: value for field, value
+                in zip(self.fields[:position], values[:position])
+            }
+            seek[f'{self.fields[position].name}__{lookup}'] = values[position]
+            condition |= Q(**seek)
+        return condition
+
+    def _reverse_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def page(self, after=None, before=None):
+        queryset = self.object_list
+        if before is not None:
+            queryset = queryset.filter(
+                self._seek(self.decode_cursor(before), forward=False)
+            ).order_by(*self._reverse_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+            if after is not None:
+                queryset = queryset.filter(
+                    self._seek(self.decode_cursor(after), forward=True))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if before is not None:
+            items.reverse()
+        if not items:
+            return CursorPage(items, self)
+        has_next = has_more if before is None else True
+        has_previous = has_more if before is not None else after is not None
+        return CursorPage(
+            items,
+            self,
+            next_cursor=self.encode_cursor(items[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(items[0]) if has_previous else None),
+        )
+
+    def get_page(self, after=None, before=None):
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
+
+
+def estimate_count(queryset):
+    """Число строк таблицы по статистике планировщика или None.
+
+    Оценка есть только для запросов без условий: для SQLite — после
+    ANALYZE (sqlite_stat1), для PostgreSQL — pg_class.reltuples."""
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для больших таблиц: вместо COUNT(*) по всей таблице
+    берёт оценку планировщика, если она больше threshold."""
+
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.threshold:
+            return estimate
+        return super().count
+
+
+def paginate_comments(post, after=None):
+    """Страница корневых комментариев; ответы добавляет attach_replies."""
+    paginator = CursorPaginator(
+        post.comments.filter(parent=None).select_related('author'),
+        settings.POSTS_COMMENTS_PER_PAGE,
+        ordering=('-created', '-id'),
+    )
+    return paginator.get_page(after=after)
+
+
+def paginate(request, object_list):
+    if settings.POSTS_PAGINATION == 'cursor':
+        paginator = CursorPaginator(object_list, settings.POSTS_PER_PAGE)
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    paginator = Paginator(object_list, settings.POSTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('page'))
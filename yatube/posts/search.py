@@ -0,0 +1,239 @@
+import re
+import threading
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Post
+
+SQLITE_TABLE = 'posts_post_search'
+
+WORD = re.compile(r'\w+')
+
+_local = threading.local()
+
+
+def stemmer():
+    # stemWord хранит состояние разбора в самом стеммере, поэтому
+    # у каждого потока свой экземпляр.
+    if not hasattr(_local, 'stemmer'):
+        _local.stemmer = snowballstemmer.stemmer('russian')
+    return _local.stemmer
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    # Стеммер написан на чистом Python, а словарь текстов невелик:
+    # основа каждого слова вычисляется один раз.
+    return stemmer().stemWord(word)
+
+
+def stems(text):
+    """Основы слов текста: SQLite не умеет стеммить русский язык,
+    поэтому в индекс FTS5 и в запрос попадают уже основы слов."""
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [stem(word) for word in words]
+
+
+def index_row(post_id, text, group_title):
+    return (post_id, ' '.join(stems(text)), ' '.join(stems(group_title)))
+
+
+class SqliteSearch:
+    """Внешний индекс FTS5; его строки обновляют сигналы записей
+    и групп, а rowid совпадает с id записи."""
+
+    stored = True
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} '
+            f'USING fts5(text, group_title, '
+            f"tokenize = 'unicode61 remove_diacritics 2')")
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+
+    def index(self, cursor, rows):
+        rows = list(rows)
+        cursor.executemany(
+            f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SQLITE_TABLE} (rowid, text, group_title) '
+            f'VALUES (%s, %s, %s)', rows)
+
+    def remove(self, cursor, post_id):
+        cursor.execute(
+            f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [post_id])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+
+    def match(self, query):
+        # Каждая основа ищется как префикс.
+        return ' '.join(f'"{term}"*' for term in stems(query))
+
+    def condition(self, query):
+        match = self.match(query)
+        if not match:
+            return None
+        return (
+            f'{Post._meta.db_table}.id IN (SELECT rowid FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s)',
+            [match],
+        )
+
+    def search(self, cursor, query, limit):
+        match = self.match(query)
+        if not match:
+            return []
+        # Группа весит вдвое меньше текста.
+        cursor.execute(
+            f'SELECT rowid FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s '
+            f'ORDER BY bm25({SQLITE_TABLE}, 1.0, 0.5) LIMIT %s',
+            [match, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearch:
+    """tsvector с конфигурацией russian по выражениям, на которые
+    построены GIN-индексы: база обновляет их сама."""
+
+    stored = False
+
+    def create(self, cursor):
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS posts_post_text_search "
+            "ON posts_post USING GIN (to_tsvector('russian', text))")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS posts_group_title_search "
+            "ON posts_group USING GIN (to_tsvector('russian', title))")
+
+    def drop(self, cursor):
+        cursor.execute('DROP INDEX IF EXISTS posts_post_text_search')
+        cursor.execute('DROP INDEX IF EXISTS posts_group_title_search')
+
+    def index(self, cursor, rows):
+        pass
+
+    def remove(self, cursor, post_id):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def condition(self, query):
+        return (
+            "to_tsvector('russian', posts_post.text) "
+            "@@ websearch_to_tsquery('russian', %s) "
+            "OR posts_post.group_id IN (SELECT id FROM posts_group "
+            "WHERE to_tsvector('russian', title) "
+            "@@ websearch_to_tsquery('russian', %s))",
+            [query, query],
+        )
+
+    def search(self, cursor, query, limit):
+        cursor.execute(
+            "SELECT p.id FROM posts_post p "
+            "LEFT JOIN posts_group g ON g.id = p.group_id, "
+            "websearch_to_tsquery('russian', %s) q "
+            "WHERE to_tsvector('russian', p.text) @@ q "
+            "OR p.group_id IN (SELECT id FROM posts_group "
+            "WHERE to_tsvector('russian', title) @@ q) "
+            "ORDER BY ts_rank("
+            "setweight(to_tsvector('russian', p.text), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(g.title, '')), 'B'),"
+            " q) DESC, p.pub_date DESC LIMIT %s",
+            [query, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SqliteSearch(),
+    'postgresql': PostgresSearch(),
+}
+
+
+def backend_for(connection):
+    return BACKENDS.get(connection.vendor)
+
+
+def _write_connection():
+    return connections[router.db_for_write(Post)]
+
+
+def index_posts(posts):
+    connection = _write_connection()
+    backend = backend_for(connection)
+    if backend is None:
+        return
+    rows = (
+        index_row(post.pk, post.text, post.group.title if post.group else '')
+        for post in posts
+    )
+    with connection.cursor() as cursor:
+        backend.index(cursor, rows)
+
+
+def remove_post(post_id):
+    connection = _write_connection()
+    backend = backend_for(connection)
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, post_id)
+
+
+def rebuild(batch_size=1000):
+    connection = _write_connection()
+    backend = backend_for(connection)
+    if backend is None or not backend.stored:
+        return 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+    posts = Post.objects.select_related('group').only(
+        'text', 'group__title').order_by('pk')
+    batch = []
+    indexed = 0
+    for post in posts.iterator(chunk_size=batch_size):
+        batch.append(post)
+        if len(batch) == batch_size:
+            index_posts(batch)
+            indexed += len(batch)
+            batch = []
+    index_posts(batch)
+    return indexed + len(batch)
+
+
+def search_ids(query):
+    """id найденных записей, от самых релевантных.
+
+    На бэкендах без полнотекстового поиска — простое вхождение строки
+    в текст записи или название группы, от новых к старым."""
+    connection = connections[router.db_for_read(Post)]
+    backend = backend_for(connection)
+    limit = settings.POSTS_SEARCH_LIMIT
+    if backend is None:
+        matches = Post.objects.filter(text__icontains=query) | \
+            Post.objects.filter(group__title__icontains=query)
+        return list(matches.values_list('pk', flat=True)[:limit])
+    with connection.cursor() as cursor:
+        return backend.search(cursor, query, limit)
+
+
+def filter_posts(queryset, query):
+    """Все записи queryset, подходящие под запрос, без ранжирования
+    и без POSTS_SEARCH_LIMIT: условие на индекс добавляется в WHERE."""
+    backend = backend_for(connections[queryset.db])
+    if backend is None:
+        return queryset.filter(
+            Q(text__icontains=query) | Q(group__title__icontains=query))
+    condition = backend.condition(query)
+    if condition is None:
+        return queryset.none()
+    where, params = condition
+    return queryset.extra(where=[where], params=params)
@@ -0,0 +1,245 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import search, timeline
+from .cache import bump
+from .counters import recount_author_stats, recount_comment_counts
+from .models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'котик собака утро вечер город море лес дорога книга музыка кофе '
+    'работа отпуск дождь снег солнце друг семья праздник фильм поезд '
+    'город небо река горы парк кухня рецепт спорт игра новость'
+).split()
+
+# Конец интервала дат, чтобы одинаковый seed давал одинаковые данные.
+END = timezone.make_aware(datetime(2021, 1, 1))
+
+
+def skewed(rng, size, exponent):
+    """Случайный номер из range(size) со степенным распределением.
+
+    При exponent = 1 распределение равномерное; чем больше exponent,
+    тем чаще выпадают первые номера: u ** exponent сгущается у нуля."""
+    return min(size - 1, int(size * rng.random() ** exponent))
+
+
+def batches(objects, size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def reset_sequence(model):
+    """После вставки с явными id счётчик id в PostgreSQL нужно сдвинуть;
+    SQLite с AUTOINCREMENT делает это сам."""
+    connection = connections[router.db_for_write(model)]
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """bulk_create подставляет «сейчас» в поля auto_now(_add);
+    на время генерации даты задаются явно."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    """Генератор синтетических данных для замеров.
+
+    Данные определяются только параметрами и seed. Строки пишутся
+    через bulk_create пачками по batch_size с явными id, поэтому
+    пути комментариев и ссылки между таблицами известны заранее,
+    а сигналы не срабатывают: счётчики, ленты и поисковый индекс
+    пересчитываются в конце."""
+
+    def __init__(self, users, posts, follows, comments, groups=20,
+                 seed=0, batch_size=5000, days=365, follow_exponent=3.0,
+                 author_exponent=2.0, group_exponent=2.0,
+                 comment_exponent=2.0, reply_share=0.5, prefix='seed',
+                 timelines=True):
+        self.counts = {
+            'users': users, 'groups': groups, 'posts': posts,
+            'follows': follows, 'comments': comments,
+        }
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.span = timedelta(days=days)
+        self.follow_exponent = follow_exponent
+        self.author_exponent = author_exponent
+        self.group_exponent = group_exponent
+        self.comment_exponent = comment_exponent
+        self.reply_share = reply_share
+        self.prefix = prefix
+        self.timelines = timelines
+
+    def run(self, log=lambda message: None):
+        self.first = {}
+        for name, model, rows in (
+                ('users', User, self.users),
+                ('groups', Group, self.groups),
+                ('posts', Post, self.posts),
+                ('follows', Follow, self.follows),
+                ('comments', Comment, self.comments)):
+            created = self.insert(name, model, rows)
+            log(f'{name}: {created}')
+        self.derive(log)
+
+    def insert(self, name, model, rows):
+        self.first[name] = first = next_id(model)
+        dates = [field for field in model._meta.concrete_fields
+                 if getattr(field, 'auto_now', False)
+                 or getattr(field, 'auto_now_add', False)]
+        created = 0
+        with explicit_dates(*dates):
+            for batch in batches(rows(first), self.batch_size):
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        batch, ignore_conflicts=model is Follow)
+                created += len(batch)
+        reset_sequence(model)
+        return created
+
+    def date(self, share):
+        """Дата, отстоящая от начала интервала на долю share."""
+        return END - self.span + self.span * share
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def users(self, first):
+        password = make_password(None)
+        for number in range(self.counts['users']):
+            yield User(
+                pk=first + number,
+                username=f'{self.prefix}_{number}',
+                password=password,
+                date_joined=self.date(0),
+            )
+
+    def groups(self, first):
+        for number in range(self.counts['groups']):
+            yield Group(
+                pk=first + number,
+                title=f'Группа {number}',
+                slug=f'{self.prefix}-{number}',
+                description=self.text(8),
+            )
+
+    def post_date(self, number):
+        # id записей растут вместе с датами, как в живой базе.
+        return self.date(number / max(1, self.counts['posts']))
+
+    def posts(self, first):
+        users, groups = self.counts['users'], self.counts['groups']
+        for number in range(self.counts['posts']):
+            group = None
+            # Четверть записей без группы, остальные — в основном
+            # в нескольких самых крупных группах.
+            if groups and self.rng.random() >= 0.25:
+                group = self.first['groups'] + skewed(
+                    self.rng, groups, self.group_exponent)
+            yield Post(
+                pk=first + number,
+                text=self.text(self.rng.randint(5, 60)),
+                author_id=self.first['users'] + skewed(
+                    self.rng, users, self.author_exponent),
+                group_id=group,
+                pub_date=self.post_date(number),
+                updated=self.post_date(number),
+            )
+
+    def follows(self, first):
+        # Читатель выбирается равномерно, автор — по степенному закону:
+        # у немногих авторов большая часть подписчиков. Повторы и
+        # подписки на себя отбрасываются.
+        users = self.counts['users']
+        for number in range(self.counts['follows']):
+            user = self.rng.randrange(users)
+            author = skewed(self.rng, users, self.follow_exponent)
+            if user == author:
+                continue
+            yield Follow(
+                user_id=self.first['users'] + user,
+                author_id=self.first['users'] + author,
+                created=self.date(self.rng.random()),
+            )
+
+    def comments(self, first):
+        # Комментарии идут ветками: корень и ответы на случайные
+        # комментарии той же ветки. Путь и ветка заполняются здесь же,
+        # ведь Comment.save() при bulk_create не вызывается.
+        posts, users = self.counts['posts'], self.counts['users']
+        total = self.counts['comments']
+        pk = first
+        while pk < first + total:
+            # Обсуждают в основном свежие записи.
+            number = posts - 1 - skewed(
+                self.rng, posts, self.comment_exponent)
+            post_id = self.first['posts'] + number
+            created = self.post_date(number)
+            thread = []
+            while pk < first + total:
+                segment = str(pk).zfill(Comment.PATH_STEP)
+                parent = None
+                if thread:
+                    parent = self.rng.choice(thread)
+                    if parent.depth >= Comment.MAX_DEPTH:
+                        parent = thread[0]
+                created = min(
+                    END, created + timedelta(
+                        minutes=self.rng.randint(1, 600)))
+                comment = Comment(
+                    pk=pk,
+                    post_id=post_id,
+                    author_id=self.first['users'] + self.rng.randrange(
+                        users),
+                    text=self.text(self.rng.randint(2, 30)),
+                    created=created,
+                    parent_id=parent.pk if parent else None,
+                    thread_id=parent.thread_id if parent else pk,
+                    path=f'{parent.path}.{segment}' if parent else segment,
+                    depth=parent.depth + 1 if parent else 0,
+                )
+                thread.append(comment)
+                pk += 1
+                yield comment
+                if self.rng.random() >= self.reply_share:
+                    break
+
+    def derive(self, log):
+        recount_author_stats()
+        recount_comment_counts()
+        log('счётчики пересчитаны')
+        if self.timelines:
+            entries = timeline.rebuild()
+            log(f'ленты подписок пересобраны: {entries}')
+        search.rebuild(batch_size=self.batch_size)
+        log('поисковый индекс перестроен')
+        bump('posts')
@@ -0,0 +1,130 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import background, search, thumbnails, timeline
+from .cache import bump
+from .counters import shift_author_stats, shift_comment_count
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(author=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_author_stats(instance.author_id, 'posts_count', 1)
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        thumbnails.queue_on_commit(instance)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    shift_author_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    shift_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_author_stats(instance.author_id, 'followers_count', 1)
+        shift_author_stats(instance.user_id, 'following_count', 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    shift_author_stats(instance.author_id, 'followers_count', -1)
+    shift_author_stats(instance.user_id, 'following_count', -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    background.submit_on_commit(
+        ('timeline', instance.author_id),
+        timeline.restore_author, instance.author_id)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, raw=False,
+                      **kwargs):
+    if raw or instance.pk is None or (
+            update_fields is not None and 'username' not in update_fields):
+        return
+    instance._stored_username = User.objects.filter(
+        pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_pages(sender, instance, update_fields=None,
+                             **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump(f'user:{instance.username}')
+    stored = instance.__dict__.pop('_stored_username', None)
+    if stored is not None and stored != instance.username:
+        # Имя автора и ссылки на него есть на всех страницах с его
+        # записями, а страница профиля по старому адресу — под старым
+        # именем.
+        bump('posts', f'user:{stored}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    usernames = User.objects.filter(
+        pk__in=[instance.user_id, instance.author_id],
+    ).values_list('username', flat=True)
+    bump(*(f'user:{username}' for username in usernames))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_post_pages(sender, **kwargs):
+    bump('posts')
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.index_posts(instance.posts.select_related('group'))
+
+
+@receiver(pre_delete, sender=Group)
+def unindex_group_title(sender, instance, **kwargs):
+    # Записи останутся без группы (SET_NULL), а их сигналы при этом
+    # не срабатывают.
+    posts = list(instance.posts.all())
+    for post in posts:
+        post.group = None
+    search.index_posts(posts)
@@ -0,0 +1,35 @@
+// Подгрузка комментариев и веток ответов без jQuery: из всей
+// клиентской части шаблонам нужны только эти два обработчика.
+(function () {
+  'use strict';
+
+  function getJSON(url, callback) {
+    fetch(url, {credentials: 'same-origin'})
+      .then(function (response) { return response.json(); })
+      .then(callback);
+  }
+
+  document.addEventListener('click', function (event) {
+    var button = event.target.closest('.thread-replies, #more-comments');
+    if (!button) {
+      return;
+    }
+    event.preventDefault();
+    if (button.id === 'more-comments') {
+      getJSON(button.getAttribute('data-url'), function (data) {
+        document.getElementById('comments')
+          .insertAdjacentHTML('beforeend', data.html);
+        if (data.next) {
+          button.setAttribute('data-url', data.next);
+        } else {
+          button.remove();
+        }
+      });
+    } else {
+      getJSON(button.getAttribute('data-url'), function (data) {
+        var thread = 'thread-' + button.getAttribute('data-thread');
+        document.getElementById(thread).innerHTML = data.html;
+      });
+    }
+  });
+})();
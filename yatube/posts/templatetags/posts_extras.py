@@ -0,0 +1,32 @@
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails
+from posts.cache import card_cache, card_key
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка записи из кеша.
+
+    Ленты заранее достают карточки всей страницы (prefetch_cards);
+    отсутствие ключа в этом словаре уже означает промах."""
+    key = card_key(post)
+    prefetched = context.get('prefetched_cards')
+    if prefetched is not None:
+        card = prefetched.get(key)
+    else:
+        card = card_cache.get(key)
+    if card is None:
+        image = thumbnails.card_image(post)
+        card = render_to_string(
+            'includes/post_card.html', {'post': post, 'image': image})
+        # Заглушку вместо изображения не кешируем: её заменят готовые
+        # варианты, как только отработает фоновый пул.
+        if image or not post.image:
+            card_cache.set(key, card, settings.POSTS_CARD_CACHE_TIMEOUT)
+    return mark_safe(card)
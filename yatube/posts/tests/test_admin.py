@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import EstimatedCountPaginator, estimate_count
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username='AdminUser', email='admin@example.com',
+            password='password')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.group = Group.objects.create(
+            title='Группа админки', slug='admin_slug', description='-')
+        cls.authors = [
+            User.objects.create_user(username=f'AdminAuthor{i}')
+            for i in range(3)
+        ]
+
+    def add_rows(self, count):
+        for i in range(count):
+            author = AdminChangelistTest.authors[i % 3]
+            post = Post.objects.create(
+                text=f'Запись {i}', author=author,
+                group=AdminChangelistTest.group)
+            Comment.objects.create(
+                post=post, author=author, text=f'Комментарий {i}')
+        for author in AdminChangelistTest.authors:
+            Follow.objects.get_or_create(
+                user=AdminChangelistTest.admin, author=author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = AdminChangelistTest.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        urls = [
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_comment_changelist'),
+            reverse('admin:posts_follow_changelist'),
+        ]
+        self.add_rows(2)
+        few = [self.count_queries(url) for url in urls]
+        self.add_rows(10)
+        many = [self.count_queries(url) for url in urls]
+        self.assertEqual(few, many)
+
+    def test_comment_search_by_username(self):
+        """Комментарии ищутся по точному имени автора."""
+        self.add_rows(3)
+        response = AdminChangelistTest.admin_client.get(
+            reverse('admin:posts_comment_changelist'),
+            {'q': 'AdminAuthor1'})
+        self.assertEqual(
+            [comment.author.username
+             for comment in response.context['cl'].result_list],
+            ['AdminAuthor1'])
+
+    def test_post_search_uses_full_text_index(self):
+        """Поиск записей в админке находит формы слова."""
+        Post.objects.create(
+            text='Горные вершины', author=AdminChangelistTest.admin)
+        response = AdminChangelistTest.admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'вершина'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Горные вершины'])
+
+    @override_settings(POSTS_SEARCH_LIMIT=2)
+    def test_post_search_is_not_limited(self):
+        """Поиск записей в админке находит больше POSTS_SEARCH_LIMIT
+        записей."""
+        self.add_rows(5)
+        response = AdminChangelistTest.admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'запись'})
+        self.assertEqual(len(response.context['cl'].result_list), 5)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='EstimateAuthor')
+        Post.objects.bulk_create(
+            Post(text=f'Запись {i}', author=author) for i in range(30))
+
+    def test_unfiltered_count_uses_statistics(self):
+        """Без фильтров число строк берётся из статистики планировщика."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Статистика SQLite')
+        self.assertIsNone(estimate_count(Post.objects.all()))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post.objects.all()), 30)
+
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        paginator.threshold = 0
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 30)
+        self.assertIsNone(estimate_count(Post.objects.filter(pk__gt=0)))
@@ -0,0 +1,205 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+from posts.urls import urlpatterns
+from PIL import Image
+from yatube import instrumentation
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_upload():
+    buffer = BytesIO()
+    Image.new('RGB', (600, 400), (30, 120, 60)).save(buffer, 'JPEG')
+    return SimpleUploadedFile(
+        'photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(REQUEST_QUERY_BUDGETS_STRICT=True, MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='BudgetAuthor')
+        cls.reader = User.objects.create_user(username='BudgetReader')
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.group = Group.objects.create(
+            title='Бюджеты', slug='budgets', description='Бюджеты')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        # У читателя тоже есть подписчик: его записи раскладываются
+        # по лентам, это самый дорогой путь new_post.
+        Follow.objects.create(user=cls.author, author=cls.reader)
+        for i in range(12):
+            post = Post.objects.create(
+                text=f'Запись {i}', author=cls.author, group=cls.group)
+        cls.post = post
+        cls.own = Post.objects.create(text='Своя', author=cls.reader)
+        root = Comment.objects.create(
+            post=post, author=cls.reader, text='Корень')
+        for i in range(5):
+            Comment.objects.create(
+                post=post, author=cls.author, text=f'Ответ {i}', parent=root)
+        post_kwargs = {'username': cls.author.username, 'post_id': post.id}
+        own_kwargs = {'username': cls.reader.username, 'post_id': cls.own.id}
+        author_kwargs = {'username': cls.author.username}
+        cls.pages = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('profile', kwargs=author_kwargs),
+            reverse('post', kwargs=post_kwargs),
+            reverse('post_comments', kwargs=post_kwargs),
+            reverse('comment_thread', kwargs={
+                **post_kwargs, 'comment_id': root.id}),
+            reverse('search') + '?q=запись',
+        ]
+        cls.reader_pages = [
+            reverse('follow_index'),
+            reverse('new_post'),
+            reverse('post_edit', kwargs=own_kwargs),
+        ]
+        cls.reader_actions = [
+            (reverse('new_post'), {'text': 'Новая'}),
+            (reverse('new_post'), {'text': 'В группе', 'group': cls.group.id}),
+            (reverse('new_post'), lambda: {
+                'text': 'С картинкой', 'group': cls.group.id,
+                'image': make_upload()}),
+            (reverse('post_edit', kwargs=own_kwargs), {'text': 'Правка'}),
+            (reverse('post_edit', kwargs=own_kwargs),
+             {'text': 'Правка в группе', 'group': cls.group.id}),
+            (reverse('post_edit', kwargs=own_kwargs), lambda: {
+                'text': 'Новая картинка', 'group': cls.group.id,
+                'image': make_upload()}),
+            (reverse('add_comment', kwargs=post_kwargs), {'text': 'Ещё'}),
+            (reverse('add_comment', kwargs=post_kwargs),
+             {'text': 'Ответ', 'parent': root.id}),
+            (reverse('profile_unfollow', kwargs=author_kwargs), None),
+            (reverse('profile_follow', kwargs=author_kwargs), None),
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+
+    def test_pages_fit_query_budgets(self):
+        """Страницы укладываются в бюджеты и для гостя, и для читателя."""
+        for url in QueryBudgetTest.pages:
+            for client in (QueryBudgetTest.guest_client,
+                           QueryBudgetTest.reader_client):
+                with self.subTest(url=url):
+                    cache.clear()
+                    client.get(url)
+        for url in QueryBudgetTest.reader_pages:
+            with self.subTest(url=url):
+                QueryBudgetTest.reader_client.get(url)
+
+    def test_actions_fit_query_budgets(self):
+        """Формы и подписки укладываются в бюджеты."""
+        for url, data in QueryBudgetTest.reader_actions:
+            if callable(data):
+                data = data()
+            with self.subTest(url=url, data=data):
+                if data is None:
+                    QueryBudgetTest.reader_client.get(url)
+                else:
+                    response = QueryBudgetTest.reader_client.post(url, data)
+                    self.assertEqual(response.status_code, 302)
+
+    def test_every_posts_route_has_budget(self):
+        """Бюджет задан для каждого адреса posts/urls.py."""
+        for pattern in urlpatterns:
+            with self.subTest(name=pattern.name):
+                self.assertIn(pattern.name, settings.REQUEST_QUERY_BUDGETS)
+
+    @override_settings(REQUEST_QUERY_BUDGETS={'index': 0})
+    def test_exceeded_budget_raises(self):
+        """Превышение бюджета в строгом режиме — исключение."""
+        with self.assertRaises(instrumentation.QueryBudgetExceeded):
+            QueryBudgetTest.guest_client.get(reverse('index'))
+
+    @override_settings(REQUEST_QUERY_BUDGETS={'index': 0},
+                       REQUEST_QUERY_BUDGETS_STRICT=False)
+    def test_exceeded_budget_is_logged(self):
+        """Без строгого режима превышение только пишется в журнал."""
+        with self.assertLogs('yatube.requests', 'WARNING') as logs:
+            response = QueryBudgetTest.guest_client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('index: 2 SQL-запросов при бюджете 0', logs.output[0])
+
+
+class RequestStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='StatsAuthor')
+        cls.staff = User.objects.create_user(
+            username='StatsStaff', is_staff=True)
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+        Post.objects.create(text='Запись', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+
+    def test_server_timing_header(self):
+        """Ответ несёт время SQL, шаблонов и общее в Server-Timing."""
+        response = Client().get(reverse('index'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="2 SQL", '
+                                 r'tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_cached_page_makes_no_queries(self):
+        """Страница из кеша не делает SQL-запросов."""
+        Client().get(reverse('index'))
+        response = Client().get(reverse('index'))
+        self.assertIn('desc="0 SQL"', response['Server-Timing'])
+
+    def test_stats_endpoint(self):
+        """Сводка по адресам доступна только персоналу."""
+        Client().get(reverse('index'))
+        Client().get(reverse('index'))
+        stats = RequestStatsTest.staff_client.get(
+            reverse('request_stats')).json()
+        self.assertEqual(stats['index']['requests'], 2)
+        self.assertEqual(stats['index']['max_queries'], 2)
+        self.assertGreater(stats['index']['template_ms'], 0)
+        response = Client().get(reverse('request_stats'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_connection_setup_is_not_counted(self):
+        """PRAGMA нового соединения не считаются запросами."""
+        primary = connections['default']
+        fresh = primary.__class__(
+            dict(primary.settings_dict), 'budgets_fresh')
+        stats = instrumentation.RequestStats()
+        try:
+            with fresh.execute_wrapper(stats):
+                with fresh.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(
+                        cursor.fetchone(),
+                        (settings.SQLITE_PRAGMAS['busy_timeout'],))
+        finally:
+            fresh.close()
+        self.assertEqual(stats.queries, 2)
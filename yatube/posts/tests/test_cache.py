@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+from posts import cache as posts_cache
+from posts.cache import NamespacedCache, bump, generations
+
+
+class NamespacedCacheTest(TestCase):
+    def setUp(self):
+        self.cache = NamespacedCache('test:stats')
+        self.addCleanup(self.cache.unregister)
+        self.cache.backend.clear()
+        self.addCleanup(self.cache.backend.clear)
+
+    def test_keys_are_namespaced(self):
+        """Ключи получают префикс пространства имён."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.backend.get('test:stats:key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_hits_and_misses_are_counted(self):
+        """Попадания и промахи попадают в статистику."""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache.get('a')
+        self.cache.get_many(['a', 'b', 'c'])
+        self.cache.get('d')
+        self.assertEqual(self.cache.stats['sets'], 2)
+        self.assertEqual(self.cache.stats['hits'], 3)
+        self.assertEqual(self.cache.stats['misses'], 2)
+        self.assertEqual(
+            posts_cache.cache_stats()['test:stats']['hits'], 3)
+
+    def test_evictions_are_counted(self):
+        """Промах по ещё живому записанному ключу считается
+        вытеснением."""
+        self.cache.set('key', 'value', timeout=60)
+        self.cache.backend.delete('test:stats:key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_unregister_removes_namespace(self):
+        """Снятая с учёта обёртка пропадает из статистики."""
+        self.cache.unregister()
+        self.assertNotIn('test:stats', posts_cache.cache_stats())
+        self.assertIn('posts:page', posts_cache.cache_stats())
+
+
+class SharedFileCacheTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+    def test_invalidation_is_shared_between_workers(self):
+        """Общий файловый кеш виден всем процессам: сброс поколения
+        одним воркером замечают остальные."""
+        caches = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.location,
+        }}
+        with override_settings(CACHES=caches):
+            before = generations('posts')
+            other_worker = FileBasedCache(self.location, {})
+            bump('posts')
+            key = posts_cache.generation_cache.make_key('posts')
+            self.assertNotEqual(other_worker.get(key), before[0])
+            self.assertEqual(generations('posts'), [other_worker.get(key)])
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_COMMENTS_PER_PAGE=3)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.author = User.objects.create_user(username='CommentsAuthor')
+        cls.post = Post.objects.create(text='Вирусная', author=cls.author)
+        cls.commenters = [
+            User.objects.create_user(username=f'Commenter{i}')
+            for i in range(7)
+        ]
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=user, text=f'Комментарий {i}')
+            for i, user in enumerate(cls.commenters)
+        ]
+        cls.post_url = reverse('post', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id})
+        cls.comments_url = reverse('post_comments', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+
+    def newest(self, start, stop):
+        return [
+            comment.id for comment in
+            reversed(CommentPaginationTest.comments)
+        ][start:stop]
+
+    def test_post_page_shows_first_comments(self):
+        """Страница записи выводит только первую страницу комментариев."""
+        response = CommentPaginationTest.guest_client.get(
+            CommentPaginationTest.post_url)
+        comments = response.context['comments']
+        self.assertEqual([c.id for c in comments], self.newest(0, 3))
+        self.assertContains(response, 'Показать ещё')
+        self.assertContains(
+            response, f'?comments_after={comments.next_cursor}')
+
+    def test_load_more_script_needs_no_jquery(self):
+        """«Показать ещё» работает на собственном скрипте без jQuery."""
+        response = CommentPaginationTest.guest_client.get(
+            CommentPaginationTest.post_url)
+        self.assertContains(response, 'posts/comments.js')
+        self.assertNotContains(response, 'jquery')
+        self.assertNotContains(response, '$(')
+        with open(finders.find('posts/comments.js'), encoding='utf-8') as f:
+            script = f.read()
+        self.assertNotIn('$', script)
+        self.assertIn('more-comments', script)
+
+    def test_comment_authors_are_joined(self):
+        """Авторы комментариев и ответов выбираются теми же запросами."""
+        with CaptureQueriesContext(connection) as context:
+            CommentPaginationTest.guest_client.get(
+                CommentPaginationTest.post_url)
+        comment_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "posts_comment"' in query['sql']
+        ]
+        # Страница корневых комментариев и первые ответы их веток.
+        self.assertEqual(len(comment_queries), 2)
+        for sql in comment_queries:
+            self.assertIn('JOIN "auth_user"', sql)
+
+    def test_load_more_returns_next_pages(self):
+        """JSON «Показать ещё» отдаёт следующие страницы до конца."""
+        response = CommentPaginationTest.guest_client.get(
+            CommentPaginationTest.post_url)
+        cursor = response.context['comments'].next_cursor
+        data = CommentPaginationTest.guest_client.get(
+            CommentPaginationTest.comments_url, {'after': cursor}).json()
+        for comment_id in self.newest(3, 6):
+            self.assertIn(f'name="comment_{comment_id}"', data['html'])
+        self.assertIsNotNone(data['next'])
+
+        data = CommentPaginationTest.guest_client.get(data['next']).json()
+        self.assertIn(
+            f'name="comment_{self.newest(6, 7)[0]}"', data['html'])
+        self.assertIsNone(data['next'])
+
+    def test_load_more_for_missing_post(self):
+        """Для несуществующей записи — 404."""
+        response = CommentPaginationTest.guest_client.get(reverse(
+            'post_comments', kwargs={
+                'username': CommentPaginationTest.author.username,
+                'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
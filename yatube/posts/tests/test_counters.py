@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='CounterAuthor')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+        cls.reader = User.objects.create_user(username='CounterReader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(author=user)
+
+    def test_stats_row_created_with_user(self):
+        """Строка статистики создаётся вместе с пользователем."""
+        stats = self.stats(CountersTest.author)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(stats.following_count, 0)
+
+    def test_new_post_and_delete_change_posts_count(self):
+        """Создание и удаление поста меняют счётчик записей."""
+        CountersTest.author_client.post(
+            reverse('new_post'), data={'text': 'Счётчик'})
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 1)
+        Post.objects.filter(author=CountersTest.author).delete()
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 0)
+
+    def test_add_comment_changes_comment_count(self):
+        """Комментарий увеличивает счётчик комментариев поста."""
+        post = Post.objects.create(text='Пост', author=CountersTest.author)
+        CountersTest.reader_client.post(
+            reverse('add_comment', kwargs={
+                'username': CountersTest.author.username,
+                'post_id': post.id}),
+            data={'text': 'Коммент'})
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_follow_and_unfollow_change_counts(self):
+        """Подписка и отписка меняют счётчики обоих пользователей."""
+        follow_url = reverse(
+            'profile_follow',
+            kwargs={'username': CountersTest.author.username})
+        CountersTest.reader_client.get(follow_url)
+        CountersTest.reader_client.get(follow_url)
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTest.reader).following_count, 1)
+
+        CountersTest.reader_client.get(reverse(
+            'profile_unfollow',
+            kwargs={'username': CountersTest.author.username}))
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTest.reader).following_count, 0)
+
+    def test_recount_stats_repairs_drift(self):
+        """Команда recount_stats исправляет расхождения счётчиков."""
+        post = Post.objects.create(text='Пост', author=CountersTest.author)
+        Comment.objects.create(
+            post=post, author=CountersTest.reader, text='Коммент')
+        Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.author)
+        AuthorStats.objects.filter(author=CountersTest.author).update(
+            posts_count=7, followers_count=0)
+        AuthorStats.objects.filter(author=CountersTest.reader).delete()
+        Post.objects.filter(pk=post.pk).update(comment_count=5)
+
+        out = StringIO()
+        call_command('recount_stats', '--dry-run', stdout=out)
+        self.assertIn('без записи 1, найдено 1', out.getvalue())
+        self.assertFalse(
+            AuthorStats.objects.filter(author=CountersTest.reader).exists())
+
+        call_command('recount_stats', stdout=StringIO())
+        author_stats = self.stats(CountersTest.author)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(self.stats(CountersTest.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_profile_shows_stored_counters(self):
+        """Профиль выводит сохранённые счётчики автора."""
+        Post.objects.create(text='Пост', author=CountersTest.author)
+        Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.author)
+        response = Client().get(reverse(
+            'profile', kwargs={'username': CountersTest.author.username}))
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Записей: 1')
+
+    def test_deleting_user_with_posts(self):
+        """Удаление пользователя с записями и подписками не создаёт
+        заново его статистику."""
+        user = User.objects.create_user(username='CounterDeleted')
+        Post.objects.create(text='Пост', author=user)
+        Follow.objects.create(user=user, author=CountersTest.author)
+        user.delete()
+        self.assertFalse(
+            AuthorStats.objects.filter(author_id=user.id).exists())
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 0)
@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+import tracemalloc
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import (SimpleUploadedFile,
+                                            TemporaryUploadedFile)
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import forms
+from posts.images import normalize
+from posts.models import Post
+
+User = get_user_model()
+
+MAKE = 0x010F
+ORIENTATION = 0x0112
+
+
+def camera_jpeg(size, orientation=None):
+    """JPEG с шумом, как у фотографии, и EXIF-тегом поворота."""
+    image = Image.merge('RGB', [
+        Image.effect_noise(size, 60) for _ in range(3)])
+    exif = Image.Exif()
+    exif[MAKE] = 'Camera'
+    if orientation:
+        exif[ORIENTATION] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=95, exif=exif)
+    return buffer.getvalue()
+
+
+def on_disk(content, name='photo.jpg'):
+    upload = TemporaryUploadedFile(name, 'image/jpeg', len(content), None)
+    upload.write(content)
+    upload.seek(0)
+    return upload
+
+
+class NormalizeImageTest(TestCase):
+    @override_settings(POSTS_IMAGE_MAX_SIZE=400, POSTS_IMAGE_FORMAT='WEBP')
+    def test_image_is_rotated_capped_and_stripped(self):
+        """Снимок поворачивается, уменьшается и теряет EXIF."""
+        content = camera_jpeg((1200, 800), orientation=6)
+        result = normalize(on_disk(content))
+
+        self.assertEqual(result.name, 'photo.webp')
+        self.assertLess(result.size, len(content) / 4)
+        with Image.open(result) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (267, 400))
+            self.assertFalse(image.getexif())
+
+    @override_settings(POSTS_IMAGE_MAX_SIZE=400, POSTS_IMAGE_FORMAT='JPEG')
+    def test_jpeg_output_is_progressive(self):
+        """В формате JPEG изображение сохраняется прогрессивным."""
+        result = normalize(on_disk(camera_jpeg((800, 600))))
+        with Image.open(result) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (400, 300))
+            self.assertTrue(image.info.get('progressive'))
+            self.assertNotIn('exif', image.info)
+
+    def test_small_gif_is_kept(self):
+        """Небольшой GIF сохраняется как есть."""
+        gif = BytesIO()
+        Image.new('P', (2, 1)).save(gif, 'GIF')
+        upload = SimpleUploadedFile('small.gif', gif.getvalue())
+        self.assertIs(normalize(upload), upload)
+
+    @override_settings(POSTS_IMAGE_MAX_SIZE=1024, POSTS_IMAGE_FORMAT='JPEG')
+    def test_upload_is_not_read_into_memory(self):
+        """Обработка большого снимка не читает файл в память целиком.
+
+        Кодировщик WebP в Pillow держит в памяти уменьшенный кадр,
+        поэтому проверяется путь через JPEG, который пишет потоком."""
+        content = camera_jpeg((4000, 3000))
+        upload = on_disk(content)
+        tracemalloc.start()
+        try:
+            result = normalize(upload)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, len(content) / 20)
+        self.assertLess(result.size, len(content) / 10)
+
+
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='UploadAuthor')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.author)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    @override_settings(POSTS_IMAGE_MAX_SIZE=600, POSTS_IMAGE_FORMAT='WEBP')
+    def test_new_post_stores_normalized_image(self):
+        """new_post сохраняет уже обработанное изображение."""
+        content = camera_jpeg((1200, 900))
+        upload = SimpleUploadedFile('IMG_0001.JPG', content)
+        PostImageUploadTest.authorized_client.post(
+            reverse('new_post'), {'text': 'Снимок', 'image': upload})
+        post = Post.objects.get(text='Снимок')
+        self.assertEqual(post.image.name, 'posts/IMG_0001.webp')
+        self.assertEqual((post.image.width, post.image.height), (600, 450))
+        self.assertLess(post.image.size, len(content))
+
+    def test_normalized_file_is_closed(self):
+        """Временный файл обработанного изображения закрывается после
+        ответа, и при сохранении записи, и при ошибке в форме."""
+        results = []
+
+        def remember(upload):
+            results.append(normalize(upload))
+            return results[-1]
+
+        for data in ({'text': 'Закрытый'}, {'text': ''}):
+            with self.subTest(data=data), mock.patch.object(
+                    forms, 'normalize', remember):
+                upload = SimpleUploadedFile(
+                    'IMG_0002.JPG', camera_jpeg((300, 300)))
+                PostImageUploadTest.authorized_client.post(
+                    reverse('new_post'), {**data, 'image': upload})
+                self.assertTrue(results[-1].closed)
+
+    @override_settings(POSTS_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_too_large_upload_is_rejected(self):
+        """Слишком большой файл не принимается формой."""
+        upload = SimpleUploadedFile('big.jpg', camera_jpeg((300, 300)))
+        response = PostImageUploadTest.authorized_client.post(
+            reverse('new_post'), {'text': 'Большой', 'image': upload})
+        self.assertFormError(
+            response, 'form', 'image',
+            'Размер файла не должен превышать 1,0\xa0КБ.')
+        self.assertFalse(Post.objects.filter(text='Большой').exists())
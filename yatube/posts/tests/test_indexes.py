@@ -0,0 +1,88 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedIndexesTest(TestCase):
+    """Запросы лент читают записи по индексу в нужном порядке:
+    без полного просмотра таблицы и без временной сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.author = User.objects.create_user(username='IndexesAuthor')
+        cls.reader = User.objects.create_user(username='IndexesReader')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+        cls.group = Group.objects.create(
+            title='Группа для планов запросов',
+            slug='indexes_slug',
+            description='Проверка индексов',
+        )
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group)
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Коммент {i}')
+
+        cls.feeds = {
+            reverse('index'): cls.guest_client,
+            reverse('group_posts', kwargs={'slug': cls.group.slug}):
+            cls.guest_client,
+            reverse('profile', kwargs={'username': cls.author.username}):
+            cls.guest_client,
+            reverse('follow_index'): cls.authorized_client,
+            reverse('post', kwargs={
+                'username': cls.author.username, 'post_id': cls.post.id}):
+            cls.guest_client,
+        }
+
+    def plans(self, url, client):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def assert_feeds_use_indexes(self, feeds):
+        for url, client in feeds.items():
+            for sql, plan in self.plans(url, client):
+                with self.subTest(url=url, sql=sql):
+                    for step in plan:
+                        self.assertNotIn('TEMP B-TREE', step)
+                        self.assertIsNone(FULL_SCAN.search(step), step)
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты, страница записи и её комментарии используют индексы."""
+        self.assert_feeds_use_indexes(FeedIndexesTest.feeds)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_feed_queries_use_indexes(self):
+        """Курсорная пагинация общих лент тоже идёт по индексам."""
+        feeds = {
+            url: client for url, client in FeedIndexesTest.feeds.items()
+            if url != reverse('follow_index')
+        }
+        self.assert_feeds_use_indexes(feeds)
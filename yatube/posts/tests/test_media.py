@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from yatube.staticfiles import IMMUTABLE
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        for name in ('posts/photo.jpg', 'cache/ab/cd/0123456789.jpg'):
+            path = os.path.join(MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as image:
+                image.write(CONTENT)
+        cls.client = Client()
+        cls.url = reverse('media', args=['posts/photo.jpg'])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url=None, **headers):
+        return MediaViewTest.client.get(url or MediaViewTest.url, **headers)
+
+    def test_whole_file(self):
+        """Файл целиком с валидаторами и сроком кеша."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=86400')
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_thumbnails_are_immutable(self):
+        """Миниатюры sorl кешируются навсегда."""
+        response = self.get(reverse('media',
+                                    args=['cache/ab/cd/0123456789.jpg']))
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+
+    def test_conditional_get(self):
+        """Совпавший ETag или неизменный файл — 304 без тела."""
+        response = self.get()
+        for headers in ({'HTTP_IF_NONE_MATCH': response['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                cached = self.get(**headers)
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.content, b'')
+                self.assertEqual(cached['ETag'], response['ETag'])
+        changed = self.get(HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(changed.status_code, 200)
+
+    def test_ranges(self):
+        """Диапазоны отдаются ответом 206 с Content-Range."""
+        size = len(CONTENT)
+        cases = {
+            'bytes=10-19': (10, 19),
+            'bytes=-5': (size - 5, size - 1),
+            'bytes=1000-': (1000, size - 1),
+            'bytes=1020-5000': (1020, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'],
+                                 f'bytes {start}-{end}/{size}')
+                body = b''.join(response.streaming_content)
+                self.assertEqual(body, CONTENT[start:end + 1])
+                self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла — 416."""
+        response = self.get(HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_range_ignored(self):
+        """Несколько диапазонов или устаревший If-Range — файл целиком."""
+        for headers in ({'HTTP_RANGE': 'bytes=0-1,5-6'},
+                        {'HTTP_RANGE': 'bytes=0-1', 'HTTP_IF_RANGE': '"old"'}):
+            with self.subTest(headers=headers):
+                response = self.get(**headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content),
+                                 CONTENT)
+
+    def test_missing_files(self):
+        """Чужие пути, каталоги и отсутствующие файлы — 404."""
+        for path in ('posts/missing.jpg', 'posts', '../settings.py'):
+            with self.subTest(path=path):
+                response = self.get(reverse('media', args=[path]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_only_safe_methods(self):
+        """Медиа только читаются."""
+        response = MediaViewTest.client.post(MediaViewTest.url)
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """С nginx тело отдаёт он, заголовки кеша — отсюда."""
+        response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/posts/photo.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('ETag', response)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Sendfile')
+    def test_x_sendfile(self):
+        """Для X-Sendfile передаётся путь к файлу на диске."""
+        response = self.get()
+        self.assertEqual(response['X-Sendfile'],
+                         os.path.join(MEDIA_ROOT, 'posts', 'photo.jpg'))
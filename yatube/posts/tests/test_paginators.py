@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Post
+from posts.paginators import CursorPaginator
+
+User = get_user_model()
+
+
+@override_settings(POSTS_PAGINATION='cursor', POSTS_PER_PAGE=4)
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='CursorMan')
+        Post.objects.bulk_create([
+            Post(text=f'Курсор {i}', author=cls.user) for i in range(10)
+        ])
+        # Одинаковое время публикации проверяет сортировку по id.
+        Post.objects.update(pub_date=timezone.now())
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_walk_forward_and_back(self):
+        """Курсоры ведут по всем записям вперёд и назад без повторов."""
+        pages = []
+        response = CursorPaginatorTest.guest_client.get(reverse('index'))
+        page = response.context['page']
+        self.assertFalse(page.has_previous())
+        pages.append([post.id for post in page])
+        while page.has_next():
+            response = CursorPaginatorTest.guest_client.get(
+                reverse('index'), {'after': page.next_cursor})
+            page = response.context['page']
+            pages.append([post.id for post in page])
+        self.assertEqual(
+            [post_id for ids in pages for post_id in ids],
+            CursorPaginatorTest.expected)
+        self.assertEqual(len(pages), 3)
+
+        response = CursorPaginatorTest.guest_client.get(
+            reverse('index'), {'before': page.previous_cursor})
+        self.assertEqual(
+            [post.id for post in response.context['page']], pages[1])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = CursorPaginatorTest.guest_client.get(
+            reverse('index'), {'after': 'не-курсор'})
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            CursorPaginatorTest.expected[:4])
+
+    def test_template_renders_cursor_links(self):
+        """Шаблон выводит ссылку на следующую страницу по курсору."""
+        response = CursorPaginatorTest.guest_client.get(reverse('index'))
+        self.assertContains(
+            response, f'?after={response.context["page"].next_cursor}')
+
+
+@override_settings(POSTS_PAGINATION='cursor', POSTS_PER_PAGE=1)
+class DeepCursorPageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='DeepCursorMan')
+        Post.objects.bulk_create([
+            Post(text=f'Глубина {i}', author=cls.user)
+            for i in range(10001)
+        ], batch_size=400)
+
+    def test_deep_page_costs_the_same_as_first(self):
+        """Страница 10 000 стоит столько же запросов, сколько первая,
+        и не использует COUNT и OFFSET."""
+        paginator = CursorPaginator(Post.objects.all(), 1)
+        deep_post = Post.objects.order_by('-pub_date', '-id')[9998]
+        cursor = paginator.encode_cursor(deep_post)
+        client = Client()
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as first:
+            client.get(reverse('index'))
+        cache.clear()
+        with CaptureQueriesContext(connection) as deep:
+            response = client.get(reverse('index'), {'after': cursor})
+
+        self.assertEqual(len(response.context['page']), 1)
+        self.assertEqual(
+            len(first.captured_queries), len(deep.captured_queries))
+        for query in deep.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Настройки читаются при импорте, поэтому профиль проверяется
+# в отдельном интерпретаторе.
+DESCRIBE = '''
+import json
+import django
+from django.conf import settings
+from django.urls import get_resolver
+django.setup()
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'apps': settings.INSTALLED_APPS,
+    'middleware': settings.MIDDLEWARE,
+    'loaders': settings.TEMPLATES[0]['OPTIONS']['loaders'],
+    'routes': [str(item.pattern) for item in get_resolver().url_patterns],
+    'views': [getattr(item, 'lookup_str', '')
+              for item in get_resolver().url_patterns],
+}))
+'''
+
+
+def describe(profile):
+    environment = dict(
+        os.environ,
+        SETTINGS_PROFILE=profile,
+        DJANGO_SETTINGS_MODULE='yatube.settings',
+    )
+    environment.pop('DEBUG', None)
+    output = subprocess.run(
+        [sys.executable, '-c', DESCRIBE], cwd=settings.BASE_DIR,
+        env=environment, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+class SettingsProfileTest(SimpleTestCase):
+    def test_production_profile(self):
+        """В production нет debug_toolbar, отладки и django.views.static."""
+        production = describe('production')
+        self.assertFalse(production['debug'])
+        self.assertNotIn('debug_toolbar', production['apps'])
+        self.assertFalse(any('debug_toolbar' in item
+                             for item in production['middleware']))
+        self.assertEqual(production['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+        self.assertNotIn('__debug__/', production['routes'])
+        self.assertNotIn('django.views.static.serve', production['views'])
+        self.assertIn('yatube.views.media', production['views'])
+
+    def test_development_profile(self):
+        """В development отладка и debug_toolbar на месте."""
+        development = describe('development')
+        self.assertTrue(development['debug'])
+        self.assertIn('debug_toolbar', development['apps'])
+        self.assertIn('__debug__/', development['routes'])
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.author = User.objects.create_user(username='QueriesAuthor')
+        cls.reader = User.objects.create_user(username='QueriesReader')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+        cls.group = Group.objects.create(
+            title='Группа для подсчёта запросов',
+            slug='queries_slug',
+            description='Проверка количества SQL-запросов',
+        )
+        for i in range(15):
+            post = Post.objects.create(
+                text=f'Пост {i}',
+                author=cls.author,
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f'Коммент {i}')
+
+        cls.feeds = {
+            reverse('index'): cls.guest_client,
+            reverse('group_posts', kwargs={'slug': cls.group.slug}):
+            cls.guest_client,
+            reverse('profile', kwargs={'username': cls.author.username}):
+            cls.guest_client,
+            reverse('follow_index'): cls.authorized_client,
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, url, client, per_page):
+        cache.clear()
+        with override_settings(POSTS_PER_PAGE=per_page):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+        self.assertEqual(len(response.context['page']), per_page)
+        return len(context.captured_queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Количество запросов ленты не зависит от числа постов
+        на странице."""
+        for url, client in FeedQueriesTest.feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.count_queries(url, client, 1),
+                    self.count_queries(url, client, 15),
+                )
+
+    def test_index_page_uses_two_queries(self):
+        """Главная страница: подсчёт записей и выборка страницы."""
+        with self.assertNumQueries(2):
+            FeedQueriesTest.guest_client.get(reverse('index'))
+
+    def test_feed_posts_have_comment_count(self):
+        """Количество комментариев посчитано в запросе ленты."""
+        response = FeedQueriesTest.guest_client.get(reverse('index'))
+        for post in response.context['page']:
+            self.assertEqual(post.comment_count, 1)
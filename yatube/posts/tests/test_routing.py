@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from posts.cache import bump
+from posts.models import Post
+from yatube.middleware import STICKY_COOKIE
+from yatube.routers import PrimaryReplicaRouter
+
+User = get_user_model()
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """Реплика — отдельный файл SQLite, снятый с основной базы; записи,
+    сделанные после снимка, видны только в основной базе."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='ReplicaAuthor')
+        self.old_post = Post.objects.create(
+            text='Есть на реплике', author=self.author)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        replica_path = os.path.join(directory, 'replica.sqlite3')
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [replica_path])
+        connections.databases['replica'] = dict(
+            connections.databases['default'], NAME=replica_path)
+        self.addCleanup(self.drop_replica)
+
+        self.new_post = Post.objects.create(
+            text='Только в основной базе', author=self.author)
+
+    def drop_replica(self):
+        connections['replica'].close()
+        del connections.databases['replica']
+        if hasattr(connections._connections, 'replica'):
+            delattr(connections._connections, 'replica')
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_views_read_from_replica(self):
+        """Страницы читают данные с реплики."""
+        response = Client().get(reverse('index'))
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            [self.old_post.id])
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запроса чтение идёт с основной базы."""
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_writer_reads_own_writes_from_primary(self):
+        """После записи пользователь читает основную базу."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(reverse('new_post'), {'text': 'Свежая'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        response = client.get(reverse('index'))
+        self.assertEqual(len(response.context['page']), 3)
+        self.assertEqual(
+            response.context['user'].username, self.author.username)
+
+    def test_fresh_generation_is_cached_from_primary(self):
+        """После записи чужая страница кешируется с основной базы."""
+        writer = Client()
+        writer.force_login(self.author)
+        writer.post(reverse('new_post'), {'text': 'Свежая'})
+        for _ in range(2):
+            response = Client().get(reverse('index'))
+            self.assertContains(response, 'Свежая')
+            self.assertContains(response, 'Только в основной базе')
+
+    def test_replica_lag_does_not_poison_cache(self):
+        """Отставшая реплика не попадает в кеш под новым поколением."""
+        reader = Client()
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            stale = reader.get(reverse('index'))
+        self.assertNotContains(stale, 'Только в основной базе')
+        bump('posts')
+        response = reader.get(reverse('index'))
+        self.assertContains(response, 'Только в основной базе')
@@ -0,0 +1,146 @@
+import threading
+from io import StringIO
+from itertools import product
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.author = User.objects.create_user(username='SearchAuthor')
+        cls.group = Group.objects.create(
+            title='Путешествия по горам',
+            slug='search_slug',
+            description='Группа для поиска',
+        )
+        cls.cats = Post.objects.create(
+            text='Коты любят рыбу и тёплые подоконники', author=cls.author)
+        cls.cat = Post.objects.create(
+            text='Кот спит, кот мурлычет, кот снова спит', author=cls.author)
+        cls.dog = Post.objects.create(
+            text='Собака лает на почтальона', author=cls.author,
+            group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_russian_word_forms_are_found(self):
+        """Поиск находит другие формы слова и не находит лишнего."""
+        self.assertCountEqual(
+            search.search_ids('котами'),
+            [PostSearchTest.cat.id, PostSearchTest.cats.id])
+        self.assertEqual(
+            search.search_ids('собаки почтальонов'), [PostSearchTest.dog.id])
+        self.assertEqual(search.search_ids('жираф'), [])
+
+    def test_results_are_ranked(self):
+        """Запись, где слово встречается чаще, стоит выше."""
+        self.assertEqual(
+            search.search_ids('кот'),
+            [PostSearchTest.cat.id, PostSearchTest.cats.id])
+
+    def test_group_title_is_searched(self):
+        """Запись находится по названию своей группы."""
+        self.assertEqual(
+            search.search_ids('путешествие'), [PostSearchTest.dog.id])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении записей и групп."""
+        post = Post.objects.get(pk=PostSearchTest.cats.id)
+        post.text = 'Попугаи любят семечки'
+        post.save()
+        self.assertEqual(search.search_ids('попугай'), [post.id])
+        self.assertNotIn(post.id, search.search_ids('коты'))
+
+        group = Group.objects.get(pk=PostSearchTest.group.id)
+        group.title = 'Прогулки'
+        group.save()
+        self.assertEqual(
+            search.search_ids('прогулка'), [PostSearchTest.dog.id])
+        group.delete()
+        self.assertEqual(search.search_ids('прогулка'), [])
+        self.assertEqual(
+            search.search_ids('собака'), [PostSearchTest.dog.id])
+
+        post.delete()
+        self.assertEqual(search.search_ids('попугай'), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {search.SQLITE_TABLE}')
+            self.assertEqual(search.search_ids('собака'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            search.search_ids('собака'), [PostSearchTest.dog.id])
+
+    @override_settings(POSTS_PER_PAGE=1)
+    def test_search_page(self):
+        """Страница поиска выводит результаты постранично."""
+        response = PostSearchTest.guest_client.get(
+            reverse('search'), {'q': 'кот'})
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            [PostSearchTest.cat.id])
+        self.assertEqual(response.context['page'].paginator.count, 2)
+        self.assertContains(
+            response, 'href="?q=%D0%BA%D0%BE%D1%82&amp;page=2"')
+
+        response = PostSearchTest.guest_client.get(
+            reverse('search'), {'q': 'жираф'})
+        self.assertContains(response, 'ничего не найдено')
+
+
+# Несколько тысяч разных словоформ, чтобы потоки стеммили одновременно.
+WORDS = [
+    ''.join(parts) for parts in product(
+        ('пере', 'за', 'вы', 'под'), ('город', 'книж', 'работ', 'читател'),
+        ('', 'ов', 'ниц'), ('а', 'ами', 'ах', 'ой', 'ую', 'ыми', 'ение'))
+]
+
+
+def in_threads(func, count=8):
+    results = [None] * count
+
+    def worker(number):
+        results[number] = [func(word) for word in WORDS]
+
+    threads = [threading.Thread(target=worker, args=(number,))
+               for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class StemmerThreadsTest(SimpleTestCase):
+    def test_stemming_is_thread_safe(self):
+        """Потоки получают те же основы, что и один поток."""
+        expected = [search.stemmer().stemWord(word) for word in WORDS]
+        for result in in_threads(search.stem.__wrapped__):
+            self.assertEqual(result, expected)
+
+    def test_cached_stems_match_under_threads(self):
+        """Кеш основ, заполненный потоками, совпадает с расчётом."""
+        expected = [search.stemmer().stemWord(word) for word in WORDS]
+        search.stem.cache_clear()
+        for result in in_threads(search.stem):
+            self.assertEqual(result, expected)
+        self.assertEqual([search.stem(word) for word in WORDS], expected)
+        self.assertGreaterEqual(search.stem.cache_info().currsize,
+                                len(set(WORDS)))
@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.db.models import F
+from posts.counters import recount_author_stats, recount_comment_counts
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.search import search_ids
+
+
+def seed(**options):
+    arguments = {
+        'users': 30, 'groups': 4, 'posts': 120, 'follows': 200,
+        'comments': 150, 'batch_size': 40, 'seed': 7,
+    }
+    arguments.update(options)
+    call_command('seed', stdout=StringIO(), **arguments)
+
+
+def snapshot():
+    """Данные без id: у одинакового seed они должны совпадать."""
+    return (
+        list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'pub_date')),
+        sorted(Follow.objects.values_list(
+            'user__username', 'author__username')),
+        list(Comment.objects.order_by('pk').values_list(
+            'text', 'post__text', 'depth')),
+    )
+
+
+class SeedCommandTest(TestCase):
+    def test_same_seed_gives_same_data(self):
+        """Одинаковый seed даёт одинаковые данные."""
+        seed()
+        first = snapshot()
+        User.objects.filter(username__startswith='seed_').delete()
+        Group.objects.filter(slug__startswith='seed-').delete()
+        seed()
+        self.assertEqual(snapshot(), first)
+        seed(seed=8, prefix='other')
+        self.assertNotEqual(
+            snapshot()[0][len(first[0]):], first[0])
+
+    def test_counts_and_distributions(self):
+        """Созданы все записи и комментарии, подписки перекошены
+        в сторону популярных авторов."""
+        seed()
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 150)
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+        top = User.objects.order_by('-stats__followers_count').first()
+        self.assertGreater(top.stats.followers_count, 200 / 30 * 3)
+
+    def test_derived_data_is_consistent(self):
+        """Счётчики, ленты и поисковый индекс пересчитаны."""
+        seed()
+        self.assertEqual(recount_author_stats(dry_run=True), (0, 0))
+        self.assertEqual(recount_comment_counts(dry_run=True), 0)
+        self.assertTrue(TimelineEntry.objects.exists())
+        post = Post.objects.first()
+        self.assertIn(post.pk, search_ids(post.text.split()[0]))
+
+    def test_comment_threads_are_valid(self):
+        """Пути и ветки комментариев заполнены как при save()."""
+        seed(reply_share=0.8)
+        replies = Comment.objects.exclude(parent=None).select_related(
+            'parent')
+        self.assertTrue(replies.exists())
+        for reply in replies:
+            self.assertEqual(reply.post_id, reply.parent.post_id)
+            self.assertEqual(reply.thread_id, reply.parent.thread_id)
+            self.assertEqual(reply.depth, reply.parent.depth + 1)
+            self.assertTrue(reply.path.startswith(reply.parent.path + '.'))
+        for root in Comment.objects.filter(parent=None):
+            self.assertEqual(root.thread_id, root.pk)
+
+    def test_ids_continue_after_seed(self):
+        """После вставки с явными id новые строки создаются как обычно."""
+        seed()
+        post = Post.objects.order_by('pk').last()
+        comment = Comment.objects.create(
+            post=post, author=post.author, text='После')
+        self.assertEqual(comment.pk, Comment.objects.count())
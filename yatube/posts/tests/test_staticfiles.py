@@ -0,0 +1,127 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, override_settings
+from yatube import staticfiles
+
+SCRIPT = 'function load() { return "комментарии"; }\n' * 50
+
+
+def call(application, path, method='GET', accept_encoding=''):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'HTTP_ACCEPT_ENCODING': accept_encoding,
+    }
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    response['body'] = b''.join(application(environ, start_response))
+    return response
+
+
+def fallback(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'posts'))
+        with open(os.path.join(cls.source, 'posts', 'comments.js'), 'w',
+                  encoding='utf-8') as script:
+            script.write(SCRIPT)
+        with open(os.path.join(cls.source, 'logo.png'), 'wb') as image:
+            image.write(os.urandom(512))
+        source = FileSystemStorage(location=cls.source)
+        with override_settings(STATIC_ROOT=cls.root):
+            storage = staticfiles.CompressedManifestStaticFilesStorage()
+            paths = {}
+            for name in ('posts/comments.js', 'logo.png'):
+                storage.save(name, source.open(name))
+                paths[name] = (source, name)
+            list(storage.post_process(paths))
+            cls.script = storage.stored_name('posts/comments.js')
+            cls.missing = storage.stored_name('bootstrap/dist/missing.css')
+        cls.application = staticfiles.StaticFilesApplication(
+            fallback, cls.root, '/static/')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_gzip_copies(self):
+        """Файл с хешем получает .gz, несжимаемый файл — нет."""
+        self.assertRegex(StaticPipelineTest.script,
+                         r'^posts/comments\.[0-9a-f]{12}\.js$')
+        path = os.path.join(StaticPipelineTest.root, StaticPipelineTest.script)
+        with gzip.open(path + '.gz') as archive:
+            self.assertEqual(archive.read().decode(), SCRIPT)
+        names = os.listdir(StaticPipelineTest.root)
+        self.assertFalse(any(name.endswith('.png.gz') for name in names))
+
+    def test_missing_file_keeps_plain_name(self):
+        """Файл не из манифеста не роняет {% static %}."""
+        self.assertEqual(StaticPipelineTest.missing,
+                         'bootstrap/dist/missing.css')
+
+    def test_compressed_copy_for_accepting_client(self):
+        """Клиенту с gzip отдаётся сжатая копия с вечным кешем."""
+        url = '/static/' + StaticPipelineTest.script
+        response = call(StaticPipelineTest.application, url,
+                        accept_encoding='br;q=0, gzip')
+        headers = response['headers']
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['Cache-Control'], staticfiles.IMMUTABLE)
+        self.assertEqual(gzip.decompress(response['body']).decode(), SCRIPT)
+        self.assertEqual(int(headers['Content-Length']),
+                         len(response['body']))
+
+    def test_identity_for_other_clients(self):
+        """Без gzip в Accept-Encoding отдаётся исходник."""
+        url = '/static/' + StaticPipelineTest.script
+        for accept_encoding in ('', 'gzip;q=0', 'identity'):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = call(StaticPipelineTest.application, url,
+                                accept_encoding=accept_encoding)
+                self.assertNotIn('Content-Encoding', response['headers'])
+                self.assertEqual(response['body'].decode(), SCRIPT)
+
+    def test_unhashed_name_is_cached_briefly(self):
+        """Имя без хеша кешируется ненадолго."""
+        response = call(StaticPipelineTest.application,
+                        '/static/posts/comments.js')
+        self.assertEqual(response['headers']['Cache-Control'],
+                         staticfiles.SHORT)
+
+    def test_head_has_no_body(self):
+        """На HEAD только заголовки."""
+        response = call(StaticPipelineTest.application,
+                        '/static/' + StaticPipelineTest.script, 'HEAD')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['body'], b'')
+
+    def test_other_requests_reach_application(self):
+        """Неизвестные пути и методы уходят в приложение."""
+        for method, path in (('GET', '/static/missing.js'),
+                             ('GET', '/static/../settings.py'),
+                             ('POST', '/static/posts/comments.js'),
+                             ('GET', '/')):
+            with self.subTest(method=method, path=path):
+                response = call(StaticPipelineTest.application, path, method)
+                self.assertEqual(response['body'], b'django')
@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post
+from posts.threads import attach_replies, thread_comments
+
+User = get_user_model()
+
+
+@override_settings(POSTS_COMMENT_REPLIES_PREVIEW=2)
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='ThreadAuthor')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.author)
+        cls.guest_client = Client()
+        cls.post = Post.objects.create(text='Обсуждение', author=cls.author)
+        cls.other_post = Post.objects.create(text='Другая', author=cls.author)
+        cls.root = cls.comment('Корень')
+        cls.first = cls.comment('Первый ответ', parent=cls.root)
+        cls.nested = cls.comment('Ответ на ответ', parent=cls.first)
+        cls.second = cls.comment('Второй ответ', parent=cls.root)
+        cls.lonely = cls.comment('Без ответов')
+        cls.add_url = reverse('add_comment', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id})
+        cls.thread_url = reverse('comment_thread', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id,
+            'comment_id': cls.root.id})
+
+    @classmethod
+    def comment(cls, text, parent=None):
+        return Comment.objects.create(
+            post=cls.post, author=cls.author, text=text, parent=parent)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_replies_inherit_thread_and_path(self):
+        """Ответ попадает в ветку корня, путь продолжает путь родителя."""
+        nested = Comment.objects.get(pk=CommentThreadTest.nested.pk)
+        self.assertEqual(nested.thread_id, CommentThreadTest.root.id)
+        self.assertEqual(nested.depth, 2)
+        self.assertEqual(nested.path, '.'.join(
+            str(pk).zfill(Comment.PATH_STEP) for pk in (
+                CommentThreadTest.root.id, CommentThreadTest.first.id,
+                CommentThreadTest.nested.id)))
+
+    def test_thread_is_loaded_in_tree_order(self):
+        """Ветка выбирается одним запросом в порядке обхода дерева."""
+        with self.assertNumQueries(1):
+            thread = list(thread_comments(CommentThreadTest.root))
+        self.assertEqual([comment.id for comment in thread], [
+            CommentThreadTest.root.id, CommentThreadTest.first.id,
+            CommentThreadTest.nested.id, CommentThreadTest.second.id])
+        self.assertEqual(thread[2].author, CommentThreadTest.author)
+
+    def test_replies_preview_is_one_query(self):
+        """Первые ответы всех веток страницы — одним запросом."""
+        roots = list(Comment.objects.filter(parent=None))
+        with self.assertNumQueries(1):
+            attach_replies(roots)
+            previews = {
+                root.id: ([reply.id for reply in root.preview_replies],
+                          root.has_more_replies)
+                for root in roots
+            }
+        self.assertEqual(previews[CommentThreadTest.root.id], (
+            [CommentThreadTest.first.id, CommentThreadTest.nested.id], True))
+        self.assertEqual(previews[CommentThreadTest.lonely.id], ([], False))
+
+    def test_too_deep_reply_is_attached_to_ancestor(self):
+        """Ответ глубже MAX_DEPTH становится ответом на предка."""
+        parent = CommentThreadTest.root
+        for number in range(Comment.MAX_DEPTH + 1):
+            parent = CommentThreadTest.comment(
+                f'Уровень {number}', parent=parent)
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH)
+        self.assertEqual(
+            Comment.objects.get(pk=parent.pk).depth, Comment.MAX_DEPTH)
+        self.assertLessEqual(len(parent.path), 255)
+
+    def test_indent_is_capped(self):
+        """Отступ ответа на странице не растёт глубже MAX_INDENT_DEPTH."""
+        root = parent = CommentThreadTest.comment('Глубокая ветка')
+        for number in range(Comment.MAX_INDENT_DEPTH + 2):
+            parent = CommentThreadTest.comment(
+                f'Глубина {number + 1}', parent=parent)
+        self.assertEqual(parent.indent, Comment.MAX_INDENT_DEPTH)
+        url = reverse('comment_thread', kwargs={
+            'username': CommentThreadTest.author.username,
+            'post_id': CommentThreadTest.post.id,
+            'comment_id': root.id})
+        data = CommentThreadTest.guest_client.get(url).json()
+        widest = Comment.MAX_INDENT_DEPTH * 2
+        self.assertIn(f'margin-left: {widest}rem', data['html'])
+        self.assertNotIn(f'margin-left: {widest + 2}rem', data['html'])
+
+    def test_add_comment_accepts_parent(self):
+        """add_comment сохраняет ответ на комментарий записи."""
+        CommentThreadTest.authorized_client.post(
+            CommentThreadTest.add_url,
+            {'text': 'Ещё ответ', 'parent': CommentThreadTest.lonely.id})
+        reply = Comment.objects.get(text='Ещё ответ')
+        self.assertEqual(reply.parent_id, CommentThreadTest.lonely.id)
+        self.assertEqual(reply.thread_id, CommentThreadTest.lonely.id)
+
+    def test_parent_from_other_post_is_rejected(self):
+        """Ответить на комментарий другой записи нельзя."""
+        foreign = Comment.objects.create(
+            post=CommentThreadTest.other_post,
+            author=CommentThreadTest.author, text='Чужой')
+        response = CommentThreadTest.authorized_client.post(
+            CommentThreadTest.add_url,
+            {'text': 'Не туда', 'parent': foreign.id})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(text='Не туда').exists())
+
+    def test_malformed_parent_is_not_found(self):
+        """Нечисловой или слишком большой parent — 404, а не ошибка."""
+        for parent in ('²', '١', 'abc', '-1', '9' * 30):
+            with self.subTest(parent=parent):
+                response = CommentThreadTest.authorized_client.post(
+                    CommentThreadTest.add_url,
+                    {'text': 'Кривой ответ', 'parent': parent})
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(text='Кривой ответ').exists())
+
+    def test_post_page_shows_replies_preview(self):
+        """Страница записи выводит первые ответы и кнопку всей ветки."""
+        response = CommentThreadTest.guest_client.get(reverse('post', kwargs={
+            'username': CommentThreadTest.author.username,
+            'post_id': CommentThreadTest.post.id}))
+        self.assertContains(
+            response, f'name="comment_{CommentThreadTest.nested.id}"')
+        self.assertNotContains(
+            response, f'name="comment_{CommentThreadTest.second.id}"')
+        self.assertContains(response, CommentThreadTest.thread_url)
+
+    def test_thread_endpoint_returns_whole_thread(self):
+        """JSON «Все ответы» отдаёт ветку целиком."""
+        data = CommentThreadTest.guest_client.get(
+            CommentThreadTest.thread_url).json()
+        for comment in (CommentThreadTest.root, CommentThreadTest.nested,
+                        CommentThreadTest.second):
+            self.assertIn(f'name="comment_{comment.id}"', data['html'])
+        self.assertNotIn(
+            f'name="comment_{CommentThreadTest.lonely.id}"', data['html'])
+
+    def test_thread_endpoint_needs_root(self):
+        """Ветку можно запросить только по корневому комментарию."""
+        response = CommentThreadTest.guest_client.get(reverse(
+            'comment_thread', kwargs={
+                'username': CommentThreadTest.author.username,
+                'post_id': CommentThreadTest.post.id,
+                'comment_id': CommentThreadTest.first.id}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from posts import background, thumbnails
+from posts.cache import card_cache, card_key
+from posts.models import Post
+
+User = get_user_model()
+
+
+def make_upload(name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 800), (30, 120, 60)).save(buffer, 'JPEG')
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        cache.clear()
+
+
+class ThumbnailPlaceholderTest(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username='ThumbAuthor')
+        self.post = Post.objects.create(
+            text='С картинкой', author=self.author, image=make_upload())
+
+    def test_missing_variants_are_not_resized_in_request(self):
+        """Пока вариантов нет, страница отдаёт заглушку и не создаёт их."""
+        response = Client().get(reverse('index'))
+        self.assertContains(response, 'card-img bg-light')
+        self.assertNotContains(response, 'srcset')
+        self.post.refresh_from_db()
+        self.assertEqual(thumbnails.variants(self.post), [])
+        self.assertIsNone(card_cache.get(card_key(self.post)))
+
+    def test_card_uses_srcset_of_ready_variants(self):
+        """Готовые варианты выводятся через srcset с ленивой загрузкой."""
+        Client().get(reverse('index'))
+        self.assertTrue(thumbnails.generate(self.post.pk))
+        self.post.refresh_from_db()
+        ready = thumbnails.variants(self.post)
+        self.assertEqual(
+            [(variant.width, variant.height) for variant in ready],
+            [(320, 113), (640, 226), (960, 339)])
+
+        response = Client().get(reverse('index'))
+        self.assertNotContains(response, 'card-img bg-light')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, thumbnails.CARD_SIZES)
+        srcset = ', '.join(
+            f'{default.storage.url(variant.name)} {variant.width}w'
+            for variant in ready)
+        self.assertContains(response, f'srcset="{srcset}"')
+        self.assertFalse(thumbnails.generate(self.post.pk))
+
+    def test_replaced_image_drops_old_variants(self):
+        """После замены изображения старые варианты не используются."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.image = make_upload('other.jpg')
+        self.post.save()
+        self.assertEqual(thumbnails.variants(self.post), [])
+
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails создаёт недостающие варианты."""
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(len(thumbnails.variants(self.post)), 3)
+
+
+@override_settings(POSTS_BACKGROUND_WORKERS=1)
+class ThumbnailWorkerTest(MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(background.shutdown)
+        self.author = User.objects.create_user(username='WorkerAuthor')
+        self.client.force_login(self.author)
+
+    def test_new_post_queues_variants(self):
+        """new_post ставит создание вариантов в фоновый пул."""
+        self.client.post(
+            reverse('new_post'), {'text': 'Фон', 'image': make_upload()})
+        background.shutdown()
+        post = Post.objects.get(text='Фон')
+        self.assertNotEqual(thumbnails.variants(post), [])
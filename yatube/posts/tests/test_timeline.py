@@ -0,0 +1,161 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='TimelineAuthor')
+        cls.reader = User.objects.create_user(username='TimelineReader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def follow_page_ids(self):
+        response = TimelineTest.reader_client.get(reverse('follow_index'))
+        return [post.id for post in response.context['page']]
+
+    def entries(self):
+        return TimelineEntry.objects.filter(user=TimelineTest.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новая запись попадает в ленту подписчика при сохранении."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author)
+        post = Post.objects.create(text='Раздача', author=TimelineTest.author)
+        self.assertTrue(self.entries().filter(post=post).exists())
+        self.assertEqual(self.follow_page_ids(), [post.id])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет прошлые записи, отписка их убирает."""
+        posts = [
+            Post.objects.create(text=f'Старая {i}', author=TimelineTest.author)
+            for i in range(3)
+        ]
+        TimelineTest.reader_client.get(reverse(
+            'profile_follow',
+            kwargs={'username': TimelineTest.author.username}))
+        self.assertEqual(self.entries().count(), len(posts))
+
+        TimelineTest.reader_client.get(reverse(
+            'profile_unfollow',
+            kwargs={'username': TimelineTest.author.username}))
+        self.assertFalse(self.entries().exists())
+        self.assertEqual(self.follow_page_ids(), [])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2, POSTS_PER_PAGE=2)
+    def test_backfill_is_bounded(self):
+        """При подписке в ленту добавляется не больше
+        TIMELINE_BACKFILL_LIMIT записей: более старых записей автора
+        в ленте нет ни на одной странице, новые добавляются."""
+        old = [
+            Post.objects.create(text=f'Старая {i}', author=TimelineTest.author)
+            for i in range(5)
+        ]
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author)
+        self.assertEqual(self.entries().count(), 2)
+        response = TimelineTest.reader_client.get(reverse('follow_index'))
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            [old[4].id, old[3].id])
+        self.assertFalse(response.context['page'].has_next())
+
+        new = Post.objects.create(text='Новая', author=TimelineTest.author)
+        self.assertEqual(
+            self.follow_page_ids(), [new.id, old[4].id])
+        self.assertEqual(self.entries().count(), 3)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_request(self):
+        """Записи популярного автора не раскладываются по лентам,
+        а выбираются при чтении."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author)
+        post = Post.objects.create(
+            text='Популярная', author=TimelineTest.author)
+        self.assertFalse(self.entries().exists())
+        self.assertEqual(self.follow_page_ids(), [post.id])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленту."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author)
+        post = Post.objects.create(text='Запись', author=TimelineTest.author)
+        self.entries().delete()
+        out = StringIO()
+        call_command(
+            'rebuild_timelines', '--user', str(TimelineTest.reader.id),
+            stdout=out)
+        self.assertEqual(out.getvalue(), 'Ленты подписок пересобраны.\n')
+        self.assertEqual(self.follow_page_ids(), [post.id])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_rebuild_keeps_latest_posts(self):
+        """Пересборка, как и подписка, берёт последние записи автора."""
+        posts = [
+            Post.objects.create(text=f'Запись {i}', author=TimelineTest.author)
+            for i in range(4)
+        ]
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author)
+        expected = set(self.entries().values_list('post_id', flat=True))
+        self.entries().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(
+            set(self.entries().values_list('post_id', flat=True)), expected)
+        self.assertEqual(self.follow_page_ids(), [
+            post.id for post in reversed(posts)][:2])
+
+
+@override_settings(TIMELINE_FANOUT_LIMIT=1, POSTS_BACKGROUND_WORKERS=0)
+class TimelineRestoreTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='RestoreAuthor')
+        self.reader = User.objects.create_user(username='RestoreReader')
+        self.fan = User.objects.create_user(username='RestoreFan')
+
+    def entries(self):
+        return TimelineEntry.objects.filter(user=self.reader)
+
+    def test_author_crossing_limit_both_ways(self):
+        """Записи и подписки времён популярности автора дописываются
+        в ленту после отписки, опустившей его до порога."""
+        early = Post.objects.create(text='До', author=self.author)
+        Follow.objects.create(user=self.fan, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        popular = Post.objects.create(text='Популярная', author=self.author)
+        self.assertFalse(self.entries().exists())
+
+        Follow.objects.filter(user=self.fan).delete()
+        self.assertCountEqual(
+            self.entries().values_list('post_id', flat=True),
+            [early.id, popular.id])
+
+        Follow.objects.create(user=self.fan, author=self.author)
+        late = Post.objects.create(text='Снова популярная', author=self.author)
+        Follow.objects.filter(user=self.fan).delete()
+        self.assertCountEqual(
+            self.entries().values_list('post_id', flat=True),
+            [early.id, popular.id, late.id])
+
+    def test_restore_adds_only_missing_rows(self):
+        """Дозаполнение не переписывает строки, которые уже в ленте."""
+        post = Post.objects.create(text='Есть', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        entry = self.entries().get()
+        self.assertEqual(timeline.restore_author(self.author.id), 0)
+
+        entry.delete()
+        self.assertEqual(timeline.restore_author(self.author.id), 1)
+        self.assertEqual(self.entries().get().post_id, post.id)
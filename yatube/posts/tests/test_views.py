@@ -1,6 +1,6 @@
 import shutil
 import tempfile
-import time
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -9,6 +9,7 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
+from posts.cache import bump, card_cache, card_key
 from posts.models import Follow, Group, Post
 
 User = get_user_model()
@@ -231,28 +232,27 @@ class PostsPagesTests(TestCase):
             self.assertEqual(pages_context, 'posts/small.gif')
 
     def test_index_cache_page(self):
-        """Проверка кеширования главной страницы 20 секунд."""
+        """Главная страница отдаётся из кеша, пока записи не менялись,
+        и обновляется сразу после создания новой записи."""
         response0 = PostsPagesTests.guest_client.get(reverse('index'))
         len0 = len(response0.context.get('page').object_list)
         self.assertEqual(len0, 1)
 
-        post2 = Post.objects.create(
+        response1 = PostsPagesTests.guest_client.get(reverse('index'))
+        self.assertIsNone(response1.context)
+        self.assertEqual(response1.content, response0.content)
+
+        Post.objects.create(
             text='Cache+1',
             author=PostsPagesTests.user,
         )
-        post2.save()
 
-        response1 = PostsPagesTests.guest_client.get(reverse('index'))
-        self.assertIsNone(response1.context)
-
-        time.sleep(20)
-        response1 = PostsPagesTests.guest_client.get(reverse('index'))
-        len1 = len(response1.context.get('page').object_list)
-        self.assertEqual(len1, 2)
+        response2 = PostsPagesTests.guest_client.get(reverse('index'))
+        len2 = len(response2.context.get('page').object_list)
+        self.assertEqual(len2, 2)
 
     def test_cache(self):
-        """Запись из базы остаётся в response.content главной страницы
-        до тех пор, пока кеш не будет очищен принудительно."""
+        """Удаление записи сразу сбрасывает кеш главной страницы."""
         response0 = PostsPagesTests.guest_client.get(reverse('index'))
         len0 = len(response0.context.get('page').object_list)
         self.assertEqual(len0, 1)
@@ -261,15 +261,43 @@ class PostsPagesTests(TestCase):
         post.delete()
 
         response1 = PostsPagesTests.guest_client.get(reverse('index'))
+        len1 = len(response1.context.get('page').object_list)
+        self.assertEqual(len1, 0)
         p = '<a name="post'
         encode = p.encode()
-        self.assertTrue(encode in response1.content)
-
-        cache.clear()
-
-        response2 = PostsPagesTests.guest_client.get(reverse('index'))
-        len2 = len(response2.context.get('page').object_list)
-        self.assertEqual(len2, 0)
+        self.assertFalse(encode in response1.content)
+
+    def test_cache_variants(self):
+        """Гость и авторизованный пользователь получают разные
+        варианты закешированной страницы."""
+        PostsPagesTests.guest_client.get(reverse('index'))
+        response = PostsPagesTests.authorized_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, PostsPagesTests.user.username)
+
+        response = PostsPagesTests.authorized_client2.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+    def test_profile_cache_invalidated_by_follow(self):
+        """Подписка сбрасывает кеш профиля автора."""
+        address = reverse(
+            'profile', kwargs={'username': PostsPagesTests.user.username})
+        PostsPagesTests.guest_client.get(address)
+        Follow.objects.create(
+            user=PostsPagesTests.user2, author=PostsPagesTests.user)
+        response = PostsPagesTests.guest_client.get(address)
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_cache_invalidated_by_rename(self):
+        """Смена имени автора сбрасывает кеш страниц с его записями."""
+        author = User.objects.create_user(username='CacheOldName')
+        Post.objects.create(text='Переименование', author=author)
+        PostsPagesTests.guest_client.get(reverse('index'))
+        author.username = 'CacheNewName'
+        author.save(update_fields=['username'])
+        response = PostsPagesTests.guest_client.get(reverse('index'))
+        self.assertContains(response, 'CacheNewName')
+        self.assertNotContains(response, 'CacheOldName')
 
 
 class FollowViewsTest(TestCase):
@@ -392,3 +420,59 @@ class PaginatorViewsTest(TestCase):
         response2 = self.guest_client.get(reverse('index') + '?page=2')
         self.assertEqual(len(response1.context.get('page').object_list), 10)
         self.assertEqual(len(response2.context.get('page').object_list), 3)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='CardAuthor')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.guest_client = Client()
+        cls.post = Post.objects.create(
+            text='Текст карточки', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_card_is_cached_and_invalidated_on_edit(self):
+        """Карточка кешируется и обновляется после редактирования."""
+        self.guest_client.get(reverse('index'))
+        self.assertIsNotNone(
+            card_cache.get(card_key(PostCardCacheTest.post)))
+
+        PostCardCacheTest.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': PostCardCacheTest.user.username,
+                'post_id': PostCardCacheTest.post.id}),
+            data={'text': 'Новый текст карточки'})
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Новый текст карточки')
+        self.assertNotContains(response, 'Текст карточки<')
+
+    def test_user_buttons_are_rendered_live(self):
+        """Кнопки пользователя не попадают в кеш карточки."""
+        self.guest_client.get(reverse('index'))
+        response = PostCardCacheTest.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Редактировать')
+        response = self.guest_client.get(reverse(
+            'profile', kwargs={'username': PostCardCacheTest.user.username}))
+        self.assertNotContains(response, 'Редактировать')
+
+    def test_page_cards_are_fetched_in_one_request(self):
+        """Карточки страницы достаются из кеша одним get_many."""
+        for i in range(3):
+            Post.objects.create(
+                text=f'Ещё карточка {i}', author=PostCardCacheTest.user)
+        self.guest_client.get(reverse('index'))
+        bump('posts')
+        get_many = mock.Mock(wraps=card_cache.get_many)
+        with mock.patch.object(card_cache, 'get') as get, \
+                mock.patch.object(card_cache, 'get_many', get_many):
+            response = self.guest_client.get(reverse('index'))
+        get.assert_not_called()
+        get_many.assert_called_once()
+        self.assertEqual(len(get_many.call_args[0][0]), 4)
+        self.assertContains(response, 'Ещё карточка 2')
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from yatube.warmup import warm_templates
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def templates(loaders):
+    options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+    return [dict(settings.TEMPLATES[0], OPTIONS=options)]
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    @override_settings(TEMPLATES=templates([
+        ('django.template.loaders.cached.Loader', LOADERS)]))
+    def test_templates_land_in_cached_loader(self):
+        """Шаблоны проекта и приложений разобраны в кеш загрузчика."""
+        warmed = warm_templates()
+        for name in ('base.html', 'includes/post_card.html',
+                     'misc/404.html', 'users/signup.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, warmed)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+        self.assertFalse(any(name.startswith('admin/') for name in warmed))
+
+    @override_settings(TEMPLATES=templates(LOADERS))
+    def test_noop_without_cached_loader(self):
+        """Без кеширующего загрузчика прогревать нечего."""
+        self.assertEqual(warm_templates(), [])
@@ -0,0 +1,63 @@
+from operator import attrgetter
+
+from django.conf import settings
+
+from .models import Comment
+
+
+def first_replies(thread_ids, limit):
+    """Условие на id первых limit ответов каждой ветки в порядке обхода.
+
+    Нумерация строк внутри ветки идёт по индексу (thread, path),
+    поэтому ответы всех веток страницы выбираются одним запросом,
+    сколько бы их ни было в каждой ветке. RawSQL здесь не подходит:
+    Django берёт его в ещё одни скобки, и SQLite читает такой IN
+    как сравнение со скалярным подзапросом."""
+    table = Comment._meta.db_table
+    placeholders = ', '.join(['%s'] * len(thread_ids))
+    return (
+        f'{table}.id IN (SELECT id FROM ('
+        f'SELECT id, ROW_NUMBER() OVER ('
+        f'PARTITION BY thread_id ORDER BY path) AS position '
+        f'FROM {table} '
+        f'WHERE thread_id IN ({placeholders}) AND parent_id IS NOT NULL'
+        f') WHERE position <= %s)',
+        [*thread_ids, limit],
+    )
+
+
+def attach_replies(comments, limit=None):
+    """Добавляет корневым комментариям первые ответы их веток.
+
+    У каждого комментария появляются preview_replies — не больше
+    limit ответов в порядке дерева — и has_more_replies, если
+    в ветке есть ещё ответы. Ответы выбираются одним запросом."""
+    if limit is None:
+        limit = settings.POSTS_COMMENT_REPLIES_PREVIEW
+    roots = {comment.thread_id: comment for comment in comments}
+    for root in roots.values():
+        root.preview_replies = []
+        root.has_more_replies = False
+    if not roots:
+        return comments
+    where, params = first_replies(sorted(roots), limit + 1)
+    replies = Comment.objects.extra(
+        where=[where], params=params,
+    ).select_related('author').order_by()
+    # Ответов не больше (limit + 1) на ветку: проще упорядочить их
+    # здесь, чем сортировать во временном B-дереве базы.
+    for reply in sorted(replies, key=attrgetter('thread_id', 'path')):
+        root = roots[reply.thread_id]
+        if len(root.preview_replies) < limit:
+            root.preview_replies.append(reply)
+        else:
+            root.has_more_replies = True
+    return comments
+
+
+def thread_comments(root):
+    """Вся ветка одним запросом: корень и ответы в порядке обхода."""
+    return Comment.objects.filter(
+        thread_id=root.thread_id,
+    ).select_related('author').order_by(
+        'path')[:settings.POSTS_COMMENT_THREAD_LIMIT]
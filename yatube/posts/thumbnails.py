@@ -0,0 +1,85 @@
+import json
+from collections import namedtuple
+
+from sorl.thumbnail import default, get_thumbnail
+
+from . import background
+from .cache import bump
+from .models import Post
+
+# Ширины вариантов изображения карточки; пропорции — как у прежней
+# миниатюры 960x339.
+CARD_WIDTHS = (320, 640, 960, 1280)
+CARD_RATIO = 339 / 960
+CARD_DEFAULT_WIDTH = 960
+# Ширина карточки в сетке Bootstrap на каждой точке перелома.
+CARD_SIZES = ('(min-width: 1200px) 1110px, (min-width: 992px) 930px, '
+              '(min-width: 768px) 690px, (min-width: 576px) 510px, 100vw')
+
+Variant = namedtuple('Variant', 'width height name')
+
+
+def variants(post):
+    """Готовые варианты изображения записи, от узкого к широкому.
+
+    Варианты хранятся в самой записи вместе с именем исходного файла:
+    после замены изображения старые варианты перестают подходить."""
+    if not post.image or not post.image_variants:
+        return []
+    stored = json.loads(post.image_variants)
+    if stored['source'] != post.image.name:
+        return []
+    return [Variant(*variant) for variant in stored['variants']]
+
+
+def card_image(post):
+    ready = variants(post)
+    if not ready:
+        return None
+    fallback = ready[0]
+    for variant in ready:
+        if variant.width <= CARD_DEFAULT_WIDTH:
+            fallback = variant
+    return {
+        'src': default.storage.url(fallback.name),
+        'srcset': ', '.join(
+            f'{default.storage.url(variant.name)} {variant.width}w'
+            for variant in ready
+        ),
+        'sizes': CARD_SIZES,
+        'width': fallback.width,
+        'height': fallback.height,
+    }
+
+
+def card_widths(source_width):
+    widths = [width for width in CARD_WIDTHS if width <= source_width]
+    return widths or CARD_WIDTHS[:1]
+
+
+def generate(post_id):
+    """Создаёт варианты изображения записи и сохраняет их размеры."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'image_variants').first()
+    if post is None or not post.image or variants(post):
+        return False
+    ready = []
+    for width in card_widths(post.image.width):
+        thumbnail = get_thumbnail(
+            post.image, f'{width}x{round(width * CARD_RATIO)}',
+            crop='center', upscale=True,
+        )
+        ready.append(Variant(thumbnail.width, thumbnail.height,
+                             thumbnail.name))
+    stored = json.dumps({'source': post.image.name, 'variants': ready})
+    Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        image_variants=stored)
+    bump('posts')
+    return True
+
+
+def queue_on_commit(post):
+    """Ставит создание вариантов изображения записи в фоновый пул."""
+    if post.image and not variants(post):
+        background.submit_on_commit(
+            ('thumbnails', post.pk), generate, post.pk)
@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F, Q
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+
+def is_fanned_out(author_id):
+    """Записи автора раскладываются по лентам подписчиков, пока у него
+    не больше TIMELINE_FANOUT_LIMIT подписчиков; ленты популярных
+    авторов собираются при чтении."""
+    return not AuthorStats.objects.filter(
+        author_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(post):
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ) for user_id in followers.iterator()
+    ], ignore_conflicts=True)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя последние TIMELINE_BACKFILL_LIMIT
+    записей автора, на которого он подписался.
+
+    Более старые записи автора в ленте подписок не показываются, в том
+    числе на дальних страницах; всё опубликованное после подписки
+    добавляет fan_out()."""
+    if not is_fanned_out(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        ) for post_id, pub_date in posts[:settings.TIMELINE_BACKFILL_LIMIT]
+    ], ignore_conflicts=True)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_ids=None, author_ids=None, replace=True):
+    """Заполняет ленты заново одним INSERT ... SELECT.
+
+    В ленту читателя попадают последние TIMELINE_BACKFILL_LIMIT записей
+    каждого автора, на которого он подписан, как при backfill(), кроме
+    авторов, чьи ленты собираются при чтении. Построчная вставка через
+    ORM на миллионах подписок заняла бы часы. user_ids и author_ids
+    ограничивают пересборку лентами этих читателей и записями этих
+    авторов; при replace=False существующие строки не удаляются,
+    а дописываются только недостающие."""
+    entries = TimelineEntry.objects.all()
+    conditions, params = ['user_id IS NOT NULL'], []
+    for column, ids in (('user_id', user_ids), ('author_id', author_ids)):
+        if ids is None:
+            continue
+        ids = list(ids)
+        entries = entries.filter(**{f'{column}__in': ids})
+        conditions.append('{} IN ({})'.format(
+            column, ', '.join(['%s'] * len(ids)) or 'NULL'))
+        params += ids
+    follows = (
+        f'SELECT user_id, author_id FROM {Follow._meta.db_table} '
+        f'WHERE {" AND ".join(conditions)}'
+    )
+    missing = '' if replace else (
+        f'AND NOT EXISTS (SELECT 1 FROM {TimelineEntry._meta.db_table} t '
+        f'WHERE t.user_id = f.user_id AND t.post_id = p.id) '
+    )
+    connection = connections[router.db_for_write(TimelineEntry)]
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        if replace:
+            entries.delete()
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM ({follows}) f '
+            f'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {Post._meta.db_table} '
+            f'WHERE author_id IN (SELECT author_id FROM ({follows}) a)'
+            f') p ON p.author_id = f.author_id AND p.position <= %s '
+            f'LEFT JOIN {AuthorStats._meta.db_table} s '
+            f'ON s.author_id = f.author_id '
+            f'WHERE COALESCE(s.followers_count, 0) <= %s {missing}'
+            # Строки по порядку индексов ленты: вставка в B-деревья
+            # идёт подряд, а не вразброс.
+            f'ORDER BY f.user_id, p.pub_date',
+            [*params, *params, settings.TIMELINE_BACKFILL_LIMIT,
+             settings.TIMELINE_FANOUT_LIMIT],
+        )
+        return cursor.rowcount
+
+
+def restore_author(author_id):
+    """Дописывает записи автора, пропущенные лентами его подписчиков.
+
+    Пока у автора больше TIMELINE_FANOUT_LIMIT подписчиков, его новые
+    записи и подписки на него не раскладываются по лентам. Когда после
+    отписки он опускается до порога, ленты снова читаются из таблицы.
+    Вызывается в фоне после каждой отписки: если самая свежая запись
+    автора есть в лентах всех подписчиков, дописывать нечего, иначе
+    добавляются только недостающие строки. Возвращает их число."""
+    if not is_fanned_out(author_id):
+        return 0
+    newest = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk').values_list('pk', flat=True).first()
+    if newest is None:
+        return 0
+    stale = Follow.objects.filter(author_id=author_id).exclude(
+        user_id__in=TimelineEntry.objects.filter(
+            post_id=newest).values('user_id'))
+    if not stale.exists():
+        return 0
+    return rebuild(author_ids=[author_id], replace=False)
+
+
+def timeline_posts(user):
+    pulled_authors = Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values('author_id')
+    if not pulled_authors.exists():
+        # Сортировка по копии даты в ленте читается прямо из индекса
+        # timeline_user_pub_date, без сортировки записей пользователя.
+        return Post.objects.filter(timeline_entries__user=user).order_by(
+            F('timeline_entries__pub_date').desc(),
+            F('timeline_entries__post').desc(),
+        )
+    pushed_posts = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(pk__in=pushed_posts) | Q(author_id__in=pulled_authors))
@@ -6,6 +6,7 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
     path('<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('<str:username>/unfollow/', views.profile_unfollow,
@@ -16,5 +17,9 @@ urlpatterns = [
          name='post_edit'),
     path('<str:username>/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
+    path('<str:username>/<int:post_id>/comments/<int:comment_id>/',
+         views.comment_thread, name='comment_thread'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
 ]
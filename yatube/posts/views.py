@@ -1,57 +1,78 @@
+from contextlib import closing
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.template.loader import render_to_string
+from django.urls import reverse
 
+from .cache import cache_versioned_page, prefetch_cards
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginators import paginate, paginate_comments
+from .search import search_ids
+from .threads import attach_replies, thread_comments
+from .timeline import timeline_posts
+
+# Наибольшее значение 64-битного первичного ключа.
+MAX_PK = 2 ** 63 - 1
 
 
-@cache_page(20)
+@cache_versioned_page('posts')
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {'page': page, })
+    post_list = Post.objects.for_feed()
+    page = paginate(request, post_list)
+    return render(request, 'index.html', {
+        'page': page,
+        'prefetched_cards': prefetch_cards(page),
+    })
 
 
+@cache_versioned_page('posts')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_post_list = group.posts.all()
-    paginator = Paginator(group_post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html',
-                  {'group': group, 'page': page}, )
+    group_post_list = group.posts.for_feed()
+    page = paginate(request, group_post_list)
+    return render(request, 'group.html', {
+        'group': group,
+        'page': page,
+        'prefetched_cards': prefetch_cards(page),
+    })
 
 
+@cache_versioned_page('posts', 'user:{username}')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.all()
-    paginator = Paginator(author_posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    author_posts = author.posts.for_feed()
+    page = paginate(request, author_posts)
+    prefetched_cards = prefetch_cards(page)
     user = request.user
     if user.is_authenticated:
         following = Follow.objects.filter(user=user, author=author).exists()
         return render(request, 'profile.html', {
                       'author': author,
                       'page': page,
+                      'prefetched_cards': prefetched_cards,
                       'following': following, })
     return render(request, 'profile.html', {
         'author': author,
         'page': page,
+        'prefetched_cards': prefetched_cards,
     })
 
 
+@cache_versioned_page('posts', anonymous_only=True)
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
     post = get_object_or_404(
-        Post, author__username=username,
-        id=post_id)
-    comments = post.comments.filter(post=post)
+        Post.objects.for_feed().select_related('author__stats'),
+        author__username=username, id=post_id)
+    author = post.author
+    comments = paginate_comments(post, request.GET.get('comments_after'))
+    attach_replies(comments)
     form = CommentForm(request.POST or None)
     return render(request, 'post.html',
                   {'post': post, 'form': form,
@@ -59,15 +80,53 @@ def post_view(request, username, post_id):
                    'author': author})
 
 
+def comment_post(username, post_id):
+    return get_object_or_404(
+        Post.objects.select_related('author').only('id', 'author__username'),
+        author__username=username, id=post_id)
+
+
+@cache_versioned_page('posts', anonymous_only=True)
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    post = comment_post(username, post_id)
+    comments = paginate_comments(post, request.GET.get('after'))
+    attach_replies(comments)
+    next_url = None
+    if comments.has_next():
+        url = reverse('post_comments', args=(username, post_id))
+        next_url = f'{url}?after={comments.next_cursor}'
+    return JsonResponse({
+        'html': render_to_string(
+            'includes/comment_list.html',
+            {'post': post, 'comments': comments}, request),
+        'next': next_url,
+    })
+
+
+@cache_versioned_page('posts', anonymous_only=True)
+def comment_thread(request, username, post_id, comment_id):
+    """Вся ветка корневого комментария для кнопки «Все ответы»."""
+    post = comment_post(username, post_id)
+    root = get_object_or_404(
+        post.comments.only('thread_id'), id=comment_id, parent=None)
+    return JsonResponse({
+        'html': render_to_string(
+            'includes/comment_thread.html',
+            {'post': post, 'thread': thread_comments(root)}, request),
+    })
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
-    if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
-        return redirect('index')
+    with closing(form):
+        if form.is_valid():
+            post = form.save(commit=False)
+            post.author = request.user
+            post.save()
+            return redirect('index')
     return render(request, 'new.html', {'form': form, 'is_new': True, })
 
 
@@ -81,10 +140,11 @@ def post_edit(request, username, post_id):
         request.POST or None,
         files=request.FILES or None,
         instance=post)
-    if form.is_valid():
-        post = form.save(commit=False)
-        form.save()
-        return redirect('post', username, post_id)
+    with closing(form):
+        if form.is_valid():
+            post = form.save(commit=False)
+            form.save()
+            return redirect('post', username, post_id)
     return render(request, 'new.html',
                   {'post': post, 'form': form})
 
@@ -102,6 +162,22 @@ def server_error(request):
     return render(request, 'misc/500.html', status=500)
 
 
+def reply_parent(request, post):
+    """Комментарий той же записи, на который отвечают, или None."""
+    parent_id = request.POST.get('parent', '')
+    if not parent_id:
+        return None
+    # Только цифры ASCII: isdigit() пропускает '²', на котором падает
+    # int(), а isdecimal() — цифры других письменностей.
+    if not (parent_id.isascii() and parent_id.isdecimal()):
+        raise Http404
+    parent_id = int(parent_id)
+    if parent_id > MAX_PK:
+        # Такое число не поместится в ключ и уронит запрос к базе.
+        raise Http404
+    return get_object_or_404(post.comments.all(), pk=parent_id)
+
+
 @login_required
 def add_comment(request, username, post_id):
     post = get_object_or_404(
@@ -111,19 +187,38 @@ def add_comment(request, username, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = reply_parent(request, post)
         comment.save()
         return redirect('post', username, post_id)
     return redirect('post', username, post_id)
 
 
 @login_required
+@cache_versioned_page('posts', 'user:{user.username}')
 def follow_index(request):
-    posts_list = Post.objects.filter(
-        author__following__user=request.user)
-    paginator = Paginator(posts_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {'page': page})
+    posts_list = timeline_posts(request.user).for_feed()
+    page = paginate(request, posts_list)
+    return render(request, 'follow.html', {
+        'page': page,
+        'prefetched_cards': prefetch_cards(page),
+    })
+
+
+@cache_versioned_page('posts')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    found = search_ids(query) if query else []
+    paginator = Paginator(found, settings.POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    posts = Post.objects.for_feed().in_bulk(page.object_list)
+    page.object_list = [
+        posts[pk] for pk in page.object_list if pk in posts]
+    return render(request, 'search.html', {
+        'query': query,
+        'page': page,
+        'page_query': urlencode({'q': query}) + '&',
+        'prefetched_cards': prefetch_cards(page),
+    })
 
 
 @login_required
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Прямо в соединение sqlite3, мимо execute_wrapper: настройка
+    # соединения не должна считаться запросом того, кто его открыл.
+    cursor = connection.connection.cursor()
+    try:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    finally:
+        cursor.close()
+
+
+@receiver(request_started)
+def close_unusable_connections(**kwargs):
+    """Постоянное соединение (CONN_MAX_AGE) проверяется в начале запроса,
+    чтобы оборванное сервером соединение не попало в представление."""
+    if not settings.DATABASE_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if (connection.connection is not None
+                and not connection.in_atomic_block
+                and not connection.is_usable()):
+            connection.close()
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import base
+
+logger = logging.getLogger('yatube.requests')
+
+# Вложенные collect() (замер снаружи и middleware внутри) считают
+# каждый своё, поэтому активных счётчиков может быть несколько.
+active_stats = ContextVar('active_stats', default=())
+
+_original_render = base.Template.render
+
+_routes = {}
+_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+    """Счётчики одного запроса: SQL-запросы и их время, время рендера
+    шаблонов верхнего уровня и общее время, в секундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка connection.execute_wrapper.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - started
+
+
+def _timed_render(self, context):
+    active = active_stats.get()
+    if not active or any(stats.rendering for stats in active):
+        # Вложенные шаблоны ({% include %}, {% extends %}) уже
+        # учтены во времени внешнего.
+        return _original_render(self, context)
+    for stats in active:
+        stats.rendering = True
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for stats in active:
+            stats.template_time += elapsed
+            stats.rendering = False
+
+
+def install():
+    """Подменяет Template.render один раз; вне collect() подмена
+    сводится к чтению ContextVar."""
+    base.Template.render = _timed_render
+
+
+@contextmanager
+def collect():
+    install()
+    stats = RequestStats()
+    token = active_stats.set(active_stats.get() + (stats,))
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+    finally:
+        stats.total_time = time.perf_counter() - started
+        active_stats.reset(token)
+
+
+def record(name, stats):
+    """Добавляет запрос к сводке по имени адреса; сводка своя у каждого
+    процесса и живёт до его перезапуска."""
+    with _lock:
+        route = _routes.setdefault(name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0,
+            'query_time': 0.0, 'template_time': 0.0,
+            'total_time': 0.0, 'max_total_time': 0.0,
+        })
+        route['requests'] += 1
+        route['queries'] += stats.queries
+        route['max_queries'] = max(route['max_queries'], stats.queries)
+        route['query_time'] += stats.query_time
+        route['template_time'] += stats.template_time
+        route['total_time'] += stats.total_time
+        route['max_total_time'] = max(
+            route['max_total_time'], stats.total_time)
+
+
+def snapshot():
+    """Средние по каждому адресу; время в миллисекундах."""
+    with _lock:
+        routes = {name: dict(route) for name, route in _routes.items()}
+    return {
+        name: {
+            'requests': route['requests'],
+            'queries': route['queries'] / route['requests'],
+            'max_queries': route['max_queries'],
+            'db_ms': route['query_time'] * 1000 / route['requests'],
+            'template_ms': route['template_time'] * 1000 / route['requests'],
+            'total_ms': route['total_time'] * 1000 / route['requests'],
+            'max_total_ms': route['max_total_time'] * 1000,
+        }
+        for name, route in sorted(routes.items())
+    }
+
+
+def reset():
+    with _lock:
+        _routes.clear()
+
+
+def server_timing(stats):
+    return ', '.join([
+        f'db;dur={stats.query_time * 1000:.1f};desc="{stats.queries} SQL"',
+        f'tpl;dur={stats.template_time * 1000:.1f}',
+        f'total;dur={stats.total_time * 1000:.1f}',
+    ])
+
+
+def check_budget(name, stats):
+    """Сверяет число запросов с REQUEST_QUERY_BUDGETS[name].
+
+    При REQUEST_QUERY_BUDGETS_STRICT превышение — исключение, на
+    котором падает тест; иначе только предупреждение в журнале."""
+    budget = settings.REQUEST_QUERY_BUDGETS.get(name)
+    if budget is None or stats.queries <= budget:
+        return
+    message = f'{name}: {stats.queries} SQL-запросов при бюджете {budget}'
+    if settings.REQUEST_QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,78 @@
+import mimetypes
+import re
+
+from django.conf import settings
+from django.utils.http import quote_etag
+
+from .staticfiles import IMMUTABLE
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+class FileRange:
+    """Файл, из которого читаются только байты [start, end].
+
+    У него нет fileno(), поэтому wsgi.file_wrapper отдаёт его чтением
+    по блокам, а не sendfile до конца файла."""
+
+    def __init__(self, file, start, end):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def content_type(path):
+    guessed, _ = mimetypes.guess_type(path)
+    return guessed or 'application/octet-stream'
+
+
+def cache_control(path):
+    """Миниатюры sorl лежат под именами-хешами и не меняются, исходные
+    загрузки кешируются на MEDIA_MAX_AGE и сверяются по ETag."""
+    if path.startswith(tuple(settings.MEDIA_IMMUTABLE_PREFIXES)):
+        return IMMUTABLE
+    return f'public, max-age={settings.MEDIA_MAX_AGE}'
+
+
+def byte_range(header, size):
+    """Диапазон (start, end) включительно из заголовка Range.
+
+    None — отдать файл целиком: заголовка нет, он не разобран или
+    диапазонов несколько (RFC 7233 разрешает их не поддерживать).
+    RangeNotSatisfiable — диапазон за пределами файла."""
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт.
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(int(last), size - 1) if last else size - 1
@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+
+from . import instrumentation
+from .routers import use_primary, wrote_to_primary
+
+STICKY_COOKIE = 'primary_until'
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтение запроса на реплику, пока пользователь недавно
+    ничего не записывал; после записи ставит cookie, и на время
+    REPLICA_STICKY_SECONDS его запросы читают основную базу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_sticky(self, request):
+        try:
+            until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+    def __call__(self, request):
+        primary = use_primary.set(
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or self.is_sticky(request))
+        wrote = wrote_to_primary.set(False)
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary.get():
+                response.set_cookie(
+                    STICKY_COOKIE,
+                    str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                    max_age=settings.REPLICA_STICKY_SECONDS,
+                    httponly=True,
+                )
+        finally:
+            use_primary.reset(primary)
+            wrote_to_primary.reset(wrote)
+        return response
+
+
+class RequestStatsMiddleware:
+    """Считает SQL-запросы, их время, время шаблонов и общее время
+    каждого запроса и сводит их по имени адреса.
+
+    Цифры уходят в заголовок Server-Timing, в строку журнала
+    yatube.requests и в сводку /stats/requests/; число запросов
+    сверяется с бюджетом адреса. Стоит первым в MIDDLEWARE, чтобы
+    учесть и запросы сессий и аутентификации."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.collect() as stats:
+            response = self.get_response(request)
+        match = request.resolver_match
+        name = match.view_name if match else '-'
+        instrumentation.record(name, stats)
+        if settings.REQUEST_STATS_SERVER_TIMING:
+            response['Server-Timing'] = instrumentation.server_timing(stats)
+        instrumentation.logger.info(
+            '%s %s %s %.1fms db=%d/%.1fms tpl=%.1fms',
+            name, request.method, response.status_code,
+            stats.total_time * 1000, stats.queries,
+            stats.query_time * 1000, stats.template_time * 1000,
+        )
+        instrumentation.check_budget(name, stats)
+        return response
@@ -0,0 +1,36 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+use_primary = ContextVar('use_primary', default=True)
+wrote_to_primary = ContextVar('wrote_to_primary', default=False)
+
+
+def replica_configured():
+    return settings.DATABASE_REPLICA_ALIAS in connections.databases
+
+
+class PrimaryReplicaRouter:
+    """Чтение в представлениях идёт с реплики, запись — в основную базу.
+
+    Вне запроса (команды, миграции) и после записи в рамках запроса
+    чтение тоже идёт с основной базы: так пользователь сразу видит
+    собственные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_primary.get() or not replica_configured():
+            return 'default'
+        return settings.DATABASE_REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        use_primary.set(True)
+        wrote_to_primary.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
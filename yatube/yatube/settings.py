@@ -1,6 +1,7 @@
 import os
 
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 env = environ.Env()
 environ.Env.read_env()
@@ -10,17 +11,28 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = env('SECRET_KEY')
 
-DEBUG = True
+# development — отладка и debug_toolbar, production — только то, что
+# нужно для обслуживания запросов.
+SETTINGS_PROFILE = env('SETTINGS_PROFILE', default='development')
 
-ALLOWED_HOSTS = [
+if SETTINGS_PROFILE not in ('development', 'production'):
+    raise ImproperlyConfigured(
+        f'Неизвестный SETTINGS_PROFILE: {SETTINGS_PROFILE}')
+
+PRODUCTION = SETTINGS_PROFILE == 'production'
+
+DEBUG = env.bool('DEBUG', default=not PRODUCTION)
+
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[
     'localhost',
     '127.0.0.1',
     '[::1]',
     'testserver',
-]
+])
 
 
 INSTALLED_APPS = [
+    'yatube.apps.YatubeConfig',
     'about',
     'users',
     'posts',
@@ -31,20 +43,24 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.RequestStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -53,30 +69,72 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
-                'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # В разработке шаблоны перечитываются с диска на каждый
+            # запрос, в production разбираются один раз на процесс.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
 
+if DEBUG:
+    TEMPLATES[0]['OPTIONS']['context_processors'].insert(
+        0, 'django.template.context_processors.debug')
+
+# Разбирать все шаблоны проекта при загрузке yatube.wsgi; без
+# кеширующего загрузчика не имеет смысла.
+TEMPLATE_WARMUP = env.bool('TEMPLATE_WARMUP', default=not DEBUG)
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': env.db(
+        'DATABASE_URL',
+        default='sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3'),
+    ),
+}
+
+DATABASES['default']['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=60)
+
+DATABASE_REPLICA_ALIAS = 'replica'
+
+if env('DATABASE_REPLICA_URL', default=None):
+    DATABASES[DATABASE_REPLICA_ALIAS] = env.db('DATABASE_REPLICA_URL')
+    DATABASES[DATABASE_REPLICA_ALIAS].update(
+        CONN_MAX_AGE=DATABASES['default']['CONN_MAX_AGE'],
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+
+# Сколько реплика может отставать: столько после записи её автор, а
+# после смены поколения кеша и все страницы этого поколения читают
+# основную базу.
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=10)
+
+DATABASE_HEALTH_CHECKS = env.bool('DATABASE_HEALTH_CHECKS', default=True)
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': env.int('SQLITE_BUSY_TIMEOUT', default=5000),
+    'synchronous': 'NORMAL',
 }
 
 
@@ -115,20 +173,136 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# В development статику отдаёт django.views.static из yatube/urls.py;
+# в production этого адреса в urls.py нет. Статику с
+# хешами в именах и сжатыми копиями из collectstatic отдаёт
+# yatube.staticfiles.StaticFilesApplication в yatube/wsgi.py, если
+# перед приложением нет фронтового сервера (SERVE_STATIC=False).
+if PRODUCTION:
+    STATICFILES_STORAGE = (
+        'yatube.staticfiles.CompressedManifestStaticFilesStorage')
+
+SERVE_STATIC = env.bool('SERVE_STATIC', default=PRODUCTION)
+
+# Медиа отдаёт yatube.views.media: ETag, 304 и Range. Без
+# MEDIA_SENDFILE_HEADER файл отдаёт сам процесс через
+# wsgi.file_wrapper; 'X-Accel-Redirect' (nginx, internal-адрес
+# MEDIA_ACCEL_PREFIX над MEDIA_ROOT) или 'X-Sendfile' (Apache,
+# lighttpd) оставляют отправку фронтовому серверу.
+SERVE_MEDIA = env.bool('SERVE_MEDIA', default=True)
+
+MEDIA_SENDFILE_HEADER = env('MEDIA_SENDFILE_HEADER', default='')
+
+if MEDIA_SENDFILE_HEADER not in ('', 'X-Accel-Redirect', 'X-Sendfile'):
+    raise ImproperlyConfigured(
+        f'Неизвестный MEDIA_SENDFILE_HEADER: {MEDIA_SENDFILE_HEADER}')
+
+MEDIA_ACCEL_PREFIX = env('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+
+# Исходные загрузки: кеш на сутки, дальше сверка по ETag.
+MEDIA_MAX_AGE = env.int('MEDIA_MAX_AGE', default=24 * 60 * 60)
+
+# THUMBNAIL_PREFIX sorl: имена миниатюр — хеши исходника и параметров,
+# файл под таким именем не меняется.
+MEDIA_IMMUTABLE_PREFIXES = ['cache/']
+
 LOGIN_URL = '/auth/login/'
 
 LOGIN_REDIRECT_URL = 'index'
 
+# Заголовок Server-Timing с цифрами RequestStatsMiddleware.
+REQUEST_STATS_SERVER_TIMING = env.bool(
+    'REQUEST_STATS_SERVER_TIMING', default=True)
+
+# Бюджеты SQL-запросов по имени адреса, с учётом запросов сессии
+# и пользователя. Превышение пишется в журнал, а при
+# REQUEST_QUERY_BUDGETS_STRICT (в тестах) — исключение.
+REQUEST_QUERY_BUDGETS = {
+    'index': 4,
+    'group_posts': 5,
+    'profile': 6,
+    'post': 5,
+    'post_comments': 5,
+    'comment_thread': 6,
+    'search': 4,
+    'follow_index': 5,
+    # Группа в форме — ещё два запроса: выбор и проверка ключа.
+    'new_post': 11,
+    'post_edit': 9,
+    'add_comment': 9,
+    'profile_follow': 13,
+    'profile_unfollow': 9,
+}
+
+REQUEST_QUERY_BUDGETS_STRICT = env.bool(
+    'REQUEST_QUERY_BUDGETS_STRICT', default=False)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # INFO — строка на каждый запрос, WARNING — только превышения
+        # бюджетов.
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': env('REQUEST_STATS_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
 }
 
+POSTS_CACHE_ALIAS = 'default'
+
 
 POSTS_PER_PAGE = 10
+
+POSTS_PAGINATION = env('POSTS_PAGINATION', default='offset')
+
+POSTS_COMMENTS_PER_PAGE = 20
+
+# Ответов каждой ветки на странице записи; остальные — по запросу.
+POSTS_COMMENT_REPLIES_PREVIEW = 3
+
+POSTS_COMMENT_THREAD_LIMIT = 500
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Глубина ленты подписок: при подписке в неё попадают только столько
+# последних записей автора, более старые в ленте не показываются.
+TIMELINE_BACKFILL_LIMIT = 500
+
+POSTS_SEARCH_LIMIT = 1000
+
+POSTS_PAGE_CACHE_TIMEOUT = 300
+
+POSTS_CARD_CACHE_TIMEOUT = 3600
+
+# Загрузки пишутся сразу во временный файл, а не в память.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+POSTS_IMAGE_MAX_UPLOAD_SIZE = env.int(
+    'POSTS_IMAGE_MAX_UPLOAD_SIZE', default=20 * 1024 * 1024)
+
+POSTS_IMAGE_MAX_SIZE = env.int('POSTS_IMAGE_MAX_SIZE', default=2048)
+
+POSTS_IMAGE_FORMAT = env('POSTS_IMAGE_FORMAT', default='WEBP')
+
+POSTS_IMAGE_QUALITY = env.int('POSTS_IMAGE_QUALITY', default=82)
+
+# Фоновый пул для миниатюр и дозаполнения лент; 0 — выполнять задачи
+# сразу, в потоке запроса.
+POSTS_BACKGROUND_WORKERS = env.int('POSTS_BACKGROUND_WORKERS', default=2)
@@ -0,0 +1,170 @@
+import gzip
+import mimetypes
+import os
+import re
+from io import BytesIO
+from wsgiref.util import FileWrapper
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    # brotli необязателен: без него собираются только .gz.
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.html',
+                '.xml', '.ico', '.eot', '.ttf', '.otf')
+
+# Сжатая копия хранится, только если она заметно меньше исходной.
+MIN_RATIO = 0.95
+
+# Имя с хешем содержимого: style.0123456789ab.css.
+HASHED = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT = 'public, max-age=60'
+
+BLOCK_SIZE = 64 * 1024
+
+
+def gzip_bytes(data):
+    # mtime=0 — одинаковый файл при каждой сборке.
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(data)
+    return buffer.getvalue()
+
+
+def compress_file(path):
+    """Кладёт рядом с файлом .gz и, если установлен brotli, .br.
+    Возвращает список созданных файлов."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip_bytes)]
+    if brotli is not None:
+        variants.append(('.br', lambda data: brotli.compress(
+            data, quality=11)))
+    created = []
+    for suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) >= len(data) * MIN_RATIO:
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        created.append(path + suffix)
+    return created
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хеш содержимого в именах файлов и сжатые копии файлов с хешем,
+    созданные один раз в collectstatic, а не на каждый запрос."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE):
+                compress_file(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в манифесте: обычный адрес (и 404 на него)
+            # вместо ошибки 500 на каждой странице с {% static %}.
+            return name
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    if '*' in accepted:
+        accepted.update(('br', 'gzip'))
+    return accepted
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT с заранее собранными заголовками для
+    исходника и каждой сжатой копии."""
+
+    def __init__(self, path, url):
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in (
+                'application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        cache_control = IMMUTABLE if HASHED.search(url) else SHORT
+        self.variants = {}
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz'), ('', '')):
+            if not os.path.isfile(path + suffix):
+                continue
+            headers = [
+                ('Content-Type', content_type),
+                ('Content-Length', str(os.path.getsize(path + suffix))),
+                ('Cache-Control', cache_control),
+            ]
+            if encoding:
+                headers.append(('Content-Encoding', encoding))
+            self.variants[encoding] = (path + suffix, headers)
+        if len(self.variants) > 1:
+            for _, headers in self.variants.values():
+                headers.append(('Vary', 'Accept-Encoding'))
+
+    def choose(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and encoding in accepted:
+                return self.variants[encoding]
+        return self.variants['']
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, отдающая STATIC_ROOT в обход Django.
+
+    Список файлов и заголовки собираются один раз при запуске, так что
+    запрос к статике — поиск в словаре и отправка файла через
+    wsgi.file_wrapper (sendfile у gunicorn и uwsgi). Остальные
+    запросы, включая неизвестные пути под STATIC_URL, уходят в
+    приложение. После collectstatic процесс нужно перезапустить."""
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                url = prefix + os.path.relpath(path, root).replace(
+                    os.sep, '/')
+                self.files[url] = StaticFile(path, url)
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        # PATH_INFO в WSGI — байты UTF-8, прочитанные как latin-1.
+        path = environ.get('PATH_INFO', '').encode('latin-1').decode(
+            'utf-8', 'replace')
+        static = self.files.get(path) if method in ('GET', 'HEAD') else None
+        if static is None:
+            return self.application(environ, start_response)
+        path, headers = static.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        start_response('200 OK', list(headers))
+        if method == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
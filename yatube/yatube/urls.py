@@ -4,6 +4,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from . import views
+
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
 
@@ -11,6 +13,16 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('stats/requests/', views.request_stats, name='request_stats'),
+]
+
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        path(settings.MEDIA_URL.lstrip('/') + '<path:path>', views.media,
+             name='media'),
+    ]
+
+urlpatterns += [
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
@@ -19,7 +31,5 @@ if settings.DEBUG:
     import debug_toolbar
 
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
@@ -0,0 +1,99 @@
+import os
+import stat as stat_module
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         JsonResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from . import instrumentation
+from .media import (FileRange, RangeNotSatisfiable, byte_range,
+                    cache_control, content_type, file_etag)
+
+
+@staff_member_required
+def request_stats(request):
+    """Сводка RequestStatsMiddleware по адресам для этого процесса."""
+    return JsonResponse(instrumentation.snapshot())
+
+
+def sendfile_response(path, filename, mimetype):
+    # Файл отдаёт фронтовой сервер, в том числе с Range.
+    response = HttpResponse(content_type=mimetype)
+    if settings.MEDIA_SENDFILE_HEADER == 'X-Accel-Redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path))
+    else:
+        response[settings.MEDIA_SENDFILE_HEADER] = filename
+    return response
+
+
+def range_response(request, filename, size, etag, mimetype):
+    """Ответ 200 или 206 с телом из файла.
+
+    Полный файл и хвост файла (bytes=N-, докачка) уходят открытым
+    файлом: под gunicorn и uwsgi wsgi.file_wrapper отдаёт их через
+    sendfile без копирования в Python."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    requested = request.META.get('HTTP_RANGE')
+    if if_range and etag not in parse_etags(if_range):
+        requested = None
+    try:
+        bounds = byte_range(requested, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    file = open(filename, 'rb')
+    if bounds is None:
+        return FileResponse(file, content_type=mimetype)
+    start, end = bounds
+    if end == size - 1:
+        file.seek(start)
+        response = FileResponse(file, content_type=mimetype, status=206)
+    else:
+        response = FileResponse(
+            FileRange(file, start, end), content_type=mimetype, status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+def media(request, path):
+    """Файлы MEDIA_ROOT с ETag, Last-Modified, 304 и Range.
+
+    При MEDIA_SENDFILE_HEADER тело отдаёт фронтовой сервер, а здесь
+    остаются проверка пути, условные запросы и заголовки кеша."""
+    try:
+        filename = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(filename)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat_module.S_ISREG(stat.st_mode):
+        raise Http404
+    etag = file_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control(path),
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        mimetype = content_type(filename)
+        if settings.MEDIA_SENDFILE_HEADER:
+            response = sendfile_response(path, filename, mimetype)
+        else:
+            response = range_response(
+                request, filename, stat.st_size, etag, mimetype)
+            headers['Accept-Ranges'] = 'bytes'
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,47 @@
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def project_template_dirs(engine):
+    """Каталоги шаблонов из TEMPLATES['DIRS'] и приложений проекта;
+    шаблоны django.contrib и сторонних пакетов не трогаем."""
+    dirs = list(engine.dirs)
+    for config in apps.get_app_configs():
+        path = os.path.join(config.path, 'templates')
+        if config.path.startswith(settings.BASE_DIR) and os.path.isdir(path):
+            dirs.append(path)
+    return dirs
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.html'):
+                path = os.path.relpath(os.path.join(root, name), directory)
+                yield path.replace(os.sep, '/')
+
+
+def warm_templates():
+    """Разбирает все шаблоны проекта в кеш cached.Loader, чтобы первые
+    запросы процесса не читали и не компилировали их с диска.
+
+    Без кеширующего загрузчика (профиль development) ничего не делает.
+    Возвращает имена разобранных шаблонов."""
+    warmed = []
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if not any(isinstance(loader, CachedLoader)
+                   for loader in engine.template_loaders):
+            continue
+        for directory in project_template_dirs(engine):
+            for name in sorted(template_names(directory)):
+                engine.get_template(name)
+                warmed.append(name)
+    return warmed
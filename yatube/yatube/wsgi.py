@@ -9,8 +9,22 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    from yatube.warmup import warm_templates
+
+    # Шаблоны разбираются до первого запроса, а при preload в
+    # gunicorn — один раз до fork для всех воркеров.
+    warm_templates()
+
+if settings.SERVE_STATIC:
+    from yatube.staticfiles import StaticFilesApplication
+
+    application = StaticFilesApplication(
+        application, settings.STATIC_ROOT, settings.STATIC_URL)